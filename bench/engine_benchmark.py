@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Browser engine benchmark.
+- Starts each installed engine (chromium, headless-shell, firefox) the
+  same way the claimer does, several times.
+- Measures start time (first start and the median of the rest), the
+  resident memory of the whole browser tree and its process count once
+  the mock login page has loaded.
+- Checks the engine can actually render the login form.
+- Recommends the lightest engine that works; set it as BROWSER_ENGINE.
+
+Example:
+    python3 bench/engine_benchmark.py --runs 5
+"""
+
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+from mock_site import MockOctoplusServer  # noqa: E402
+
+
+def measure(claimer, engine, login_url):
+    """Start the engine once; returns (start seconds, tree RSS MB, processes, login form found)"""
+    from proctree import descendants, tree_rss_mb
+
+    start = time.monotonic()
+    driver = claimer.setup_stealth_driver(engine=engine)
+    started = time.monotonic() - start
+    try:
+        driver.get(login_url)
+        works = bool(driver.find_elements(claimer.By.CSS_SELECTOR, claimer.LOGIN_EMAIL_SELECTOR))
+        root_pid = driver.service.process.pid
+        return started, tree_rss_mb(root_pid), len(descendants(root_pid)), works
+    finally:
+        claimer.close_driver(driver)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare start time and memory of the installed browser engines")
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--engines', default='chromium,headless-shell,firefox',
+                        help="Comma-separated engines to try")
+    args = parser.parse_args()
+
+    # Keep the benchmark's browser profiles away from the real ones
+    profile_dir = None
+    if 'BROWSER_PROFILE_DIR' not in os.environ:
+        profile_dir = os.environ['BROWSER_PROFILE_DIR'] = tempfile.mkdtemp(prefix='engine-bench-')
+    server = None
+    results = []
+    try:
+        try:
+            import claimer
+            claimer.load_selenium()
+        except ImportError as e:
+            sys.exit(f"Selenium is needed to benchmark browser engines: {e}")
+        from engines import ENGINES, EngineUnavailable
+
+        server = MockOctoplusServer().start()
+        login_url = f"{server.base_url}/login/"
+        for name in filter(None, (part.strip() for part in args.engines.split(','))):
+            try:
+                ENGINES[name].resolve()
+            except (KeyError, EngineUnavailable) as e:
+                print(f"{name}: skipped ({e})")
+                continue
+            samples = []
+            for run in range(args.runs):
+                try:
+                    samples.append(measure(claimer, name, login_url))
+                except Exception as e:
+                    print(f"{name}: run {run + 1} failed: {e}")
+                    break
+            if samples:
+                results.append((name, samples))
+    finally:
+        if server:
+            server.stop()
+        if profile_dir:
+            shutil.rmtree(profile_dir, ignore_errors=True)
+
+    print(f"\n{'engine':<16} {'first start':>12} {'median start':>13} {'RSS MB':>8} {'procs':>6}  works")
+    for name, samples in results:
+        later = [sample[0] for sample in samples[1:]] or [samples[0][0]]
+        rss = statistics.median(sample[1] for sample in samples)
+        procs = max(sample[2] for sample in samples)
+        works = all(sample[3] for sample in samples)
+        print(f"{name:<16} {samples[0][0]:>11.2f}s {statistics.median(later):>12.2f}s {rss:>8.0f} {procs:>6}  "
+              f"{'yes' if works else 'NO'}")
+
+    working = [(statistics.median(s[1] for s in samples), name) for name, samples in results
+               if all(s[3] for s in samples)]
+    if working:
+        print(f"\nLightest working engine: {min(working)[1]} (set BROWSER_ENGINE={min(working)[1]} in .env)")
+    else:
+        print("\nNo engine loaded the login page.")
+
+
+if __name__ == "__main__":
+    main()
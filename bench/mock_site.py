@@ -0,0 +1,208 @@
+"""
+Local mock of the Octoplus pages the claimer visits.
+- Serves login, dashboard and partner offer pages (any slug) on localhost.
+- The offer page can be put in each state the claimer tells apart.
+- Adds configurable latency and jitter to every response.
+
+Run standalone with: python3 bench/mock_site.py --scenario button_present
+"""
+
+import argparse
+import random
+import threading
+import time
+import uuid
+from http.cookies import SimpleCookie
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+SCENARIOS = ['codes_tomorrow', 'already_activated', 'button_present', 'button_missing']
+
+PAGE = """<!DOCTYPE html>
+<html lang="en-GB">
+<head>
+  <meta charset="utf-8">
+  <title>{title} | Octopus Energy</title>
+  <link rel="stylesheet" href="/static/app.css">
+  <link rel="preload" href="/static/font.woff2" as="font" crossorigin>
+  <script src="/static/analytics.js" async></script>
+</head>
+<body>
+  <header><img src="/static/logo.png" alt="Octopus Energy"></header>
+  <main>{body}</main>
+</body>
+</html>"""
+
+LOGIN_BODY = """
+<h1>Log in</h1>
+<form method="post" action="/login/">
+  <input type="hidden" name="csrfmiddlewaretoken" value="{csrf}">
+  <input type="email" name="auth-username" autocomplete="email">
+  <input type="password" name="auth-password" autocomplete="current-password">
+  <button type="submit">Log in</button>
+</form>"""
+
+OFFER_BODIES = {
+    'codes_tomorrow': """
+<h1>Caffè Nero</h1>
+<p>All of this week's codes have gone. More codes tomorrow!</p>""",
+    'already_activated': """
+<h1>Caffè Nero</h1>
+<p>Offer activated. You've already claimed your coffee this week.</p>""",
+    'button_present': """
+<h1>Caffè Nero</h1>
+<p>Get a free drink at Caffè Nero every week.</p>
+<form method="post" action="{path}/activate/">
+  <input type="hidden" name="csrfmiddlewaretoken" value="{csrf}">
+  <button type="submit" class="sc-fPxMrc primary"><span>Activate offer</span></button>
+</form>""",
+    'button_missing': """
+<h1>Caffè Nero</h1>
+<p>Get a free drink at Caffè Nero every week.</p>
+<div class="offer-card"></div>""",
+}
+
+ACTIVATED_BODY = """
+<h1>Caffè Nero</h1>
+<p>Offer activated! Your code: <strong>{code}</strong></p>"""
+
+STATIC = {
+    '/static/app.css': ('text/css', b"body{font-family:sans-serif}" * 200),
+    '/static/analytics.js': ('application/javascript', b"window.__analytics=1;" * 500),
+    '/static/font.woff2': ('font/woff2', b"\x00" * 20000),
+    '/static/logo.png': ('image/png', b"\x89PNG\r\n\x1a\n" + b"\x00" * 30000),
+    '/robots.txt': ('text/plain', b"User-agent: *\nDisallow:\n"),
+}
+
+
+class MockOctoplusHandler(BaseHTTPRequestHandler):
+    server_version = "MockOctoplus/1.0"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _delay(self):
+        latency, jitter = self.server.latency, self.server.jitter
+        if latency or jitter:
+            time.sleep(latency + random.uniform(0, jitter))
+
+    def _session(self):
+        cookie = SimpleCookie(self.headers.get('Cookie', ''))
+        session_id = cookie['sessionid'].value if 'sessionid' in cookie else None
+        return session_id if session_id in self.server.sessions else None
+
+    def _send(self, status, body=b'', content_type='text/html; charset=utf-8', headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _page(self, title, body):
+        self._send(200, PAGE.format(title=title, body=body).encode())
+
+    def _redirect(self, location, headers=None):
+        self._send(302, headers={'Location': location, **(headers or {})})
+
+    def do_GET(self):
+        self._delay()
+        self.server.request_count += 1
+        path = self.path.split('?')[0]
+
+        if path in STATIC:
+            content_type, body = STATIC[path]
+            return self._send(200, body, content_type, {'Cache-Control': 'public, max-age=86400'})
+        if path == '/login/':
+            return self._page("Log in", LOGIN_BODY.format(csrf=uuid.uuid4().hex))
+
+        session_id = self._session()
+        if not session_id:
+            return self._redirect('/login/')
+        if path == '/dashboard/':
+            return self._page("Dashboard", "<h1>Your account</h1><p>Octoplus rewards</p>")
+        if '/octoplus/partner/offers/' in path:
+            code = self.server.sessions[session_id].get('codes', {}).get(path.rstrip("/"))
+            if code:
+                return self._page("Caffè Nero", ACTIVATED_BODY.format(code=code))
+            body = OFFER_BODIES[self.server.scenario].format(path=path.rstrip("/"), csrf=uuid.uuid4().hex)
+            return self._page("Caffè Nero", body)
+        self._send(404, b"Not found")
+
+    def do_POST(self):
+        self._delay()
+        self.server.request_count += 1
+        path = self.path.split('?')[0]
+        length = int(self.headers.get('Content-Length') or 0)
+        form = parse_qs(self.rfile.read(length).decode())
+
+        if path == '/login/':
+            email = form.get('auth-username', [''])[0]
+            password = form.get('auth-password', [''])[0]
+            if not email or password != self.server.password:
+                return self._page("Log in", "<p>Invalid email or password</p>" + LOGIN_BODY.format(csrf=uuid.uuid4().hex))
+            session_id = uuid.uuid4().hex
+            self.server.sessions[session_id] = {}
+            self.server.login_count += 1
+            return self._redirect('/dashboard/', {'Set-Cookie': f'sessionid={session_id}; Path=/; HttpOnly'})
+
+        session_id = self._session()
+        if not session_id:
+            return self._redirect('/login/')
+        if path.endswith('/activate/') and self.server.scenario == 'button_present':
+            code = f"NERO-{random.randint(1000, 9999)}"
+            # Codes are per offer, so one session can activate several offers
+            offer_path = path[:-len('/activate/')]
+            self.server.sessions[session_id].setdefault('codes', {})[offer_path] = code
+            self.server.activation_count += 1
+            return self._page("Caffè Nero", ACTIVATED_BODY.format(code=code))
+        self._send(404, b"Not found")
+
+
+class MockOctoplusServer(ThreadingHTTPServer):
+    """Threaded mock site; scenario, latency and jitter can be changed between runs"""
+
+    daemon_threads = True
+
+    def __init__(self, scenario='button_present', latency=0.0, jitter=0.0, password='password',
+                 host='127.0.0.1', port=0):
+        super().__init__((host, port), MockOctoplusHandler)
+        self.scenario = scenario
+        self.latency = latency
+        self.jitter = jitter
+        self.password = password
+        self.sessions = {}
+        self.request_count = 0
+        self.login_count = 0
+        self.activation_count = 0
+        self._thread = None
+
+    @property
+    def base_url(self):
+        return f"http://{self.server_address[0]}:{self.server_address[1]}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve a local mock of the Octoplus pages")
+    parser.add_argument('--scenario', choices=SCENARIOS, default='button_present')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.0, help="Seconds added to every response")
+    parser.add_argument('--jitter', type=float, default=0.0, help="Extra random seconds (0..jitter)")
+    args = parser.parse_args()
+
+    server = MockOctoplusServer(args.scenario, args.latency, args.jitter, port=args.port)
+    print(f"Mock Octoplus ({args.scenario}) on {server.base_url} - log in with any email and 'password'")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
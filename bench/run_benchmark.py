@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Offline end-to-end benchmark for claimer.py.
+- Starts the local mock Octoplus site (bench/mock_site.py).
+- Runs claimer.py's main() in a fresh process per run, pointed at the mock.
+- Reports wall time, CPU time, peak RSS and Chromium process count per scenario.
+
+Example:
+    python3 bench/run_benchmark.py --runs 5 --latency 0.05 --jitter 0.1
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from mock_site import MockOctoplusServer, SCENARIOS
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CLAIMER = os.path.join(REPO_DIR, 'claimer.py')
+SAMPLE_INTERVAL = 0.1
+PAGE_SIZE_KB = os.sysconf('SC_PAGE_SIZE') // 1024
+
+
+def _read_proc_table():
+    """Map pid -> (ppid, rss_kb, cmdline) for every process we can see"""
+    table = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        pid = int(entry)
+        try:
+            with open(f'/proc/{pid}/stat', 'r') as f:
+                stat = f.read()
+            # comm may contain spaces; fields after the closing paren are fixed
+            fields = stat[stat.rindex(')') + 2:].split()
+            ppid = int(fields[1])
+            rss_kb = int(fields[21]) * PAGE_SIZE_KB
+            with open(f'/proc/{pid}/cmdline', 'rb') as f:
+                cmdline = f.read().replace(b'\0', b' ').decode(errors='replace')
+        except (OSError, ValueError, IndexError):
+            continue
+        table[pid] = (ppid, rss_kb, cmdline)
+    return table
+
+
+def sample_tree(root_pid):
+    """Return (total RSS in KB, number of Chromium processes) for a process tree"""
+    table = _read_proc_table()
+    children = {}
+    for pid, (ppid, _, _) in table.items():
+        children.setdefault(ppid, []).append(pid)
+
+    total_rss = 0
+    chromium = 0
+    stack = [root_pid]
+    while stack:
+        pid = stack.pop()
+        if pid not in table:
+            continue
+        _, rss_kb, cmdline = table[pid]
+        total_rss += rss_kb
+        if 'chrom' in cmdline and 'chromedriver' not in cmdline:
+            chromium += 1
+        stack.extend(children.get(pid, []))
+    return total_rss, chromium
+
+
+def run_once(server, scenario, backend, workdir, extra_env):
+    """Run claimer.py once; returns a dict of measurements"""
+    env = dict(os.environ)
+    env.update({
+        'OCTOPUS_EMAIL': 'bench@example.com',
+        'OCTOPUS_PASSWORD': server.password,
+        'OCTOPUS_ACCOUNT_ID': 'A-BENCH001',
+        'OCTOPUS_BASE_URL': server.base_url,
+        'OCTOPUS_STATE_FILE': os.path.join(workdir, 'last_claim.txt'),
+        'CLAIM_HISTORY_DB': os.path.join(workdir, 'claims.db'),
+        'OCTOPUS_SESSION_FILE': os.path.join(workdir, 'session.json'),
+        'OCTOPUS_LOG_FILE': os.path.join(workdir, 'claimer.log'),
+        'METRICS_FILE': os.path.join(workdir, 'metrics.jsonl'),
+        'LOCATOR_CACHE_FILE': os.path.join(workdir, 'locator_cache.json'),
+        'CLAIM_BACKEND': backend,
+    })
+    env.update(extra_env)
+
+    start = time.monotonic()
+    process = subprocess.Popen([sys.executable, CLAIMER], env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    peak_rss = 0
+    peak_chromium = 0
+    while True:
+        pid, status, rusage = os.wait4(process.pid, os.WNOHANG)
+        if pid:
+            break
+        rss, chromium = sample_tree(process.pid)
+        peak_rss = max(peak_rss, rss)
+        peak_chromium = max(peak_chromium, chromium)
+        time.sleep(SAMPLE_INTERVAL)
+    wall = time.monotonic() - start
+    # Popen must not try to reap the child again
+    process.returncode = os.waitstatus_to_exitcode(status)
+
+    outcome = None
+    try:
+        with open(env['METRICS_FILE'], 'r') as f:
+            outcome = json.loads(f.readlines()[-1]).get('outcome')
+    except (OSError, ValueError, IndexError):
+        pass
+
+    return {
+        'scenario': scenario,
+        'exit_code': process.returncode,
+        'outcome': outcome,
+        'wall_seconds': wall,
+        'cpu_seconds': rusage.ru_utime + rusage.ru_stime,
+        'peak_rss_mb': peak_rss / 1024,
+        'peak_chromium_processes': peak_chromium,
+    }
+
+
+def summarise(results):
+    wall = [r['wall_seconds'] for r in results]
+    cpu = [r['cpu_seconds'] for r in results]
+    outcomes = {}
+    for r in results:
+        outcomes[r['outcome']] = outcomes.get(r['outcome'], 0) + 1
+    return {
+        'runs': len(results),
+        'wall_p50': statistics.median(wall),
+        'wall_max': max(wall),
+        'cpu_mean': statistics.mean(cpu),
+        'peak_rss_mb': max(r['peak_rss_mb'] for r in results),
+        'peak_chromium_processes': max(r['peak_chromium_processes'] for r in results),
+        'outcomes': outcomes,
+    }
+
+
+def print_table(summaries):
+    header = f"{'scenario':<18} {'runs':>4} {'wall p50':>9} {'wall max':>9} {'cpu mean':>9} {'peak RSS':>10} {'chromium':>8}  outcomes"
+    print(header)
+    print("-" * len(header))
+    for scenario, s in summaries.items():
+        outcomes = ", ".join(f"{k}={v}" for k, v in s['outcomes'].items())
+        print(f"{scenario:<18} {s['runs']:>4} {s['wall_p50']:>8.2f}s {s['wall_max']:>8.2f}s "
+              f"{s['cpu_mean']:>8.2f}s {s['peak_rss_mb']:>7.1f} MB {s['peak_chromium_processes']:>8}  {outcomes}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark claimer.py against a local mock Octoplus site")
+    parser.add_argument('--scenarios', nargs='+', choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument('--runs', type=int, default=3, help="Runs per scenario")
+    parser.add_argument('--latency', type=float, default=0.0, help="Seconds added to every response")
+    parser.add_argument('--jitter', type=float, default=0.0, help="Extra random seconds (0..jitter)")
+    parser.add_argument('--backend', default='selenium', choices=['auto', 'http', 'selenium'])
+    parser.add_argument('--env', action='append', default=[], metavar='KEY=VALUE',
+                        help="Extra environment for claimer.py (repeatable)")
+    parser.add_argument('--json', metavar='FILE', help="Also write every run's results to FILE")
+    args = parser.parse_args()
+
+    extra_env = dict(item.split('=', 1) for item in args.env)
+    server = MockOctoplusServer(latency=args.latency, jitter=args.jitter).start()
+    all_results = []
+    summaries = {}
+    try:
+        for scenario in args.scenarios:
+            server.scenario = scenario
+            results = []
+            for run in range(args.runs):
+                # Fresh state per run so every run does the full claim flow
+                with tempfile.TemporaryDirectory(prefix='octopus-bench-') as workdir:
+                    result = run_once(server, scenario, args.backend, workdir, extra_env)
+                print(f"{scenario} run {run + 1}/{args.runs}: {result['outcome']} in {result['wall_seconds']:.2f}s",
+                      file=sys.stderr)
+                results.append(result)
+            summaries[scenario] = summarise(results)
+            all_results.extend(results)
+    finally:
+        server.stop()
+
+    print_table(summaries)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'summaries': summaries, 'runs': all_results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark for the "already claimed this week" fast exit.
+- Seeds a temporary claim history with a claim from today.
+- Times claimer.py end to end over several runs and fails if the median
+  exceeds a latency budget.
+- Prints the slowest imports (python -X importtime) and fails if a heavy
+  module such as Selenium is imported on the fast path.
+
+Example:
+    python3 bench/startup_benchmark.py --runs 20 --max-ms 100
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CLAIMER = os.path.join(REPO_DIR, 'claimer.py')
+sys.path.insert(0, REPO_DIR)
+
+from history import HistoryStore  # noqa: E402
+
+# Importing any of these means the fast path is paying for work it does not need
+FORBIDDEN_MODULES = ['selenium', 'requests', 'urllib3', 'http_backend', 'session_store',
+                     'multi_account', 'daemon', 'smart_schedule', 'urllib.request']
+
+
+def fast_exit_env(workdir):
+    env = dict(os.environ)
+    env.update({
+        'OCTOPUS_EMAIL': 'bench@example.com',
+        'OCTOPUS_PASSWORD': 'password',
+        'OCTOPUS_ACCOUNT_ID': 'A-BENCH001',
+        'CLAIM_HISTORY_DB': os.path.join(workdir, 'claims.db'),
+        'OCTOPUS_STATE_FILE': os.path.join(workdir, 'last_claim.txt'),
+        'OCTOPUS_LOG_FILE': os.path.join(workdir, 'claimer.log'),
+        'METRICS_FILE': os.path.join(workdir, 'metrics.jsonl'),
+    })
+    HistoryStore(env['CLAIM_HISTORY_DB']).record_attempt(env['OCTOPUS_ACCOUNT_ID'], 'claimed')
+    return env
+
+
+def parse_importtime(stderr):
+    """Return {module: cumulative microseconds} from -X importtime output"""
+    imports = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        imports[name.strip()] = int(cumulative)
+    return imports
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Guard the latency of claimer.py's already-claimed fast exit")
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--max-ms', type=float, default=100.0, help="Fail if the median run is slower than this")
+    parser.add_argument('--top', type=int, default=15, help="How many of the slowest imports to show")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix='octopus-startup-') as workdir:
+        env = fast_exit_env(workdir)
+
+        timings = []
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, CLAIMER], env=env, check=True,
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            timings.append((time.perf_counter() - start) * 1000)
+
+        traced = subprocess.run([sys.executable, '-X', 'importtime', CLAIMER], env=env, check=True,
+                                stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        log_written = os.path.exists(env['OCTOPUS_LOG_FILE'])
+
+    imports = parse_importtime(traced.stderr)
+    print("Slowest imports on the fast path (cumulative):")
+    for name, micros in sorted(imports.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+        print(f"  {micros / 1000:7.1f} ms  {name}")
+
+    median = statistics.median(timings)
+    print(f"\nFast exit over {args.runs} runs: median {median:.0f} ms, "
+          f"min {min(timings):.0f} ms, max {max(timings):.0f} ms (budget {args.max_ms:.0f} ms)")
+
+    failures = []
+    heavy = [name for name in imports if name.strip() in FORBIDDEN_MODULES]
+    if heavy:
+        failures.append(f"heavy modules imported on the fast path: {', '.join(sorted(heavy))}")
+    if log_written:
+        failures.append("the log file was opened on the fast path")
+    if median > args.max_ms:
+        failures.append(f"median {median:.0f} ms is over the {args.max_ms:.0f} ms budget")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
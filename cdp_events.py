@@ -0,0 +1,177 @@
+"""
+Chrome DevTools Protocol event buffer.
+- Drains chromedriver's performance log (CDP events) on demand.
+- Tracks in-flight network requests so callers can wait for network idle;
+  requests that never finish stop counting after a couple of seconds.
+- Counts requests, bytes transferred, cache hits and blocked requests.
+- Keeps a record of recent requests (method, URL, payload, status) so a
+  caller can wait for one particular response and read its body.
+"""
+
+import base64
+import json
+import logging
+import time
+from collections import deque, OrderedDict
+
+MAX_BUFFERED_EVENTS = 5000
+MAX_TRACKED_REQUESTS = 500
+# A request still open after this long (long poll, beacon, stream) no longer counts against network idle
+STALE_REQUEST_SECONDS = 2.0
+LONG_LIVED_TYPES = {'EventSource', 'WebSocket'}  # Never expected to finish, so never tracked as in flight
+
+
+class CdpEventLog:
+    """Buffered view of the CDP events chromedriver records for one driver"""
+
+    def __init__(self, driver, max_events=MAX_BUFFERED_EVENTS):
+        self.driver = driver
+        self.events = deque(maxlen=max_events)
+        self.inflight = {}  # requestId -> when it started
+        self.last_activity = time.monotonic()
+        self.available = True
+        self.requests = OrderedDict()  # requestId -> what we know about the request so far
+        self.sequence = 0
+        self.reset_counters()
+
+    def reset_counters(self):
+        self.counters = {'requests': 0, 'bytes': 0, 'from_cache': 0, 'blocked': 0, 'failed': 0}
+
+    def poll(self):
+        """Pull new events from the driver; returns the list of new events"""
+        if not self.available:
+            return []
+        try:
+            entries = self.driver.get_log('performance')
+        except Exception as e:
+            # Performance logging was not enabled for this driver
+            logging.debug(f"CDP performance log unavailable: {e}")
+            self.available = False
+            return []
+
+        new_events = []
+        for entry in entries:
+            try:
+                event = json.loads(entry['message'])['message']
+            except (KeyError, ValueError):
+                continue
+            method = event.get('method', '')
+            params = event.get('params', {})
+
+            if method == 'Network.requestWillBeSent':
+                if params.get('type') not in LONG_LIVED_TYPES:
+                    self.inflight[params.get('requestId')] = time.monotonic()
+                self.last_activity = time.monotonic()
+                self.counters['requests'] += 1
+                self._track_request(params)
+            elif method == 'Network.loadingFinished':
+                self.inflight.pop(params.get('requestId'), None)
+                self.last_activity = time.monotonic()
+                self.counters['bytes'] += int(params.get('encodedDataLength') or 0)
+                self._update_request(params, finished=True)
+            elif method == 'Network.loadingFailed':
+                self.inflight.pop(params.get('requestId'), None)
+                self.last_activity = time.monotonic()
+                if params.get('blockedReason'):
+                    self.counters['blocked'] += 1
+                else:
+                    self.counters['failed'] += 1
+                self._update_request(params, failed=params.get('errorText') or params.get('blockedReason'))
+            elif method == 'Network.requestServedFromCache':
+                self.counters['from_cache'] += 1
+            elif method == 'Network.responseReceived':
+                response = params.get('response', {})
+                if response.get('fromDiskCache'):
+                    self.counters['from_cache'] += 1
+                self._update_request(params, status=response.get('status'), mime_type=response.get('mimeType'))
+
+            self.events.append(event)
+            new_events.append(event)
+        return new_events
+
+    def _track_request(self, params):
+        request = params.get('request', {})
+        record = self.requests.get(params.get('requestId'))
+        if record is not None:
+            # A redirect keeps the request id; remember where it ended up but keep the original method
+            record['url'] = request.get('url')
+            record['redirects'] += 1
+            return
+        self.sequence += 1
+        self.requests[params.get('requestId')] = {
+            'id': params.get('requestId'),
+            'seq': self.sequence,
+            'method': request.get('method'),
+            'url': request.get('url', ''),
+            'post_data': request.get('postData', ''),
+            'type': params.get('type'),
+            'redirects': 0,
+            'status': None,
+            'mime_type': None,
+            'finished': False,
+            'failed': None,
+            'started': time.monotonic(),
+            'ended': None,
+        }
+        while len(self.requests) > MAX_TRACKED_REQUESTS:
+            self.requests.popitem(last=False)
+
+    def _update_request(self, params, **changes):
+        record = self.requests.get(params.get('requestId'))
+        if record is None:
+            return
+        record.update(changes)
+        if changes.get('finished') or changes.get('failed'):
+            record['ended'] = time.monotonic()
+
+    def wait_for_request(self, matches, after_seq=0, timeout=10, start_timeout=3, interval=0.1):
+        """Wait for the first request after `after_seq` that matches(record) to complete.
+
+        Returns its record (check 'failed' and 'status'), or None if no such
+        request started within start_timeout or none completed within timeout.
+        """
+        start = time.monotonic()
+        while True:
+            self.poll()
+            if not self.available:
+                return None
+            candidates = [record for record in self.requests.values()
+                          if record['seq'] > after_seq and matches(record)]
+            for record in candidates:
+                if record['finished'] or record['failed']:
+                    return record
+            elapsed = time.monotonic() - start
+            if elapsed > timeout or (not candidates and elapsed > start_timeout):
+                return None
+            time.sleep(interval)
+
+    def response_body(self, request_id):
+        """The body of a completed response as text, or None if Chrome no longer has it"""
+        try:
+            result = self.driver.execute_cdp_cmd('Network.getResponseBody', {'requestId': request_id})
+        except Exception as e:
+            logging.debug(f"Could not read response body for {request_id}: {e}")
+            return None
+        body = result.get('body', '')
+        if result.get('base64Encoded'):
+            body = base64.b64decode(body).decode(errors='replace')
+        return body
+
+    def idle_seconds(self):
+        """How long the network has been quiet (0 while recent requests are in flight)"""
+        self.poll()
+        now = time.monotonic()
+        self.inflight = {request_id: started for request_id, started in self.inflight.items()
+                         if now - started < STALE_REQUEST_SECONDS}
+        if self.inflight:
+            return 0.0
+        return now - self.last_activity
+
+
+def event_log(driver):
+    """Return the CdpEventLog attached to a driver, creating it on first use"""
+    log = getattr(driver, '_cdp_event_log', None)
+    if log is None:
+        log = CdpEventLog(driver)
+        driver._cdp_event_log = log
+    return log
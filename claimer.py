@@ -2,7 +2,9 @@
 """
 Octopus Energy Caffè Nero Coffee Claimer - Final Stealth Version
 - Claims once per week, retrying daily until successful.
-- Uses a state file to track the last successful claim.
+- Uses a claim history database to track the last successful claim.
+- Checks the history before importing Selenium, so the common
+  "already claimed this week" run exits almost immediately.
 """
 
 import time
@@ -10,51 +12,117 @@ import logging
 import os
 import random
 import sys
-from datetime import datetime, date, timedelta
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.common.action_chains import ActionChains
-from selenium.common.exceptions import TimeoutException, NoSuchElementException, WebDriverException
+import sqlite3
+import threading
+import argparse
+from urllib.parse import urlparse
+from contextlib import contextmanager
+from page_state import (classify_offer, extract_code, CLASSIFY_TIMEOUT, UNAVAILABLE, ALREADY_ACTIVATED, ACTIONABLE,
+                        ACTIVATED, UNKNOWN)
+from readiness import wait_for, wait_for_page_load, url_contains
+from locator import find_best_element
+from form_input import fill_field, mode_for_attempt
+from metrics import start_run, current_run, timed, run_outcome
+from cdp_events import event_log
+from confirmation import mark_requests, confirm_activation
+from history import record_attempt, load_attempts, default_store, HISTORY_DB, DEFAULT_OFFER
+from offers import load_offers, due_offers
+from phases import (Checkpoint, PhaseFailed, run_phase, POLICIES, DRIVER_READY, AUTHENTICATED,
+                    OFFER_LOADED, OFFER_ACTIVATED, VERIFIED)
+from resource_policy import (add_lean_options, hold_cache_slot, release_cache_slot, apply_resource_policy,
+                             resource_usage, RESOURCE_POLICY)
+
+# Selenium (and requests, via the HTTP backend) are imported on first use only.
+# Until then the exception names point at a placeholder nothing ever raises.
+class _SeleniumNotLoaded(Exception):
+    pass
+
+webdriver = By = WebDriverWait = EC = Options = Service = ActionChains = None
+TimeoutException = NoSuchElementException = WebDriverException = _SeleniumNotLoaded
+
+_selenium_lock = threading.Lock()
+
+def load_selenium():
+    """Import Selenium into this module the first time a browser is needed (thread-safe)"""
+    global webdriver, By, WebDriverWait, EC, Options, Service, ActionChains
+    global TimeoutException, NoSuchElementException, WebDriverException
+    if webdriver is not None:
+        return
+    with _selenium_lock:
+        if webdriver is not None:
+            return
+        from selenium import webdriver as _webdriver
+        from selenium.webdriver.common.by import By as _By
+        from selenium.webdriver.support.ui import WebDriverWait as _WebDriverWait
+        from selenium.webdriver.support import expected_conditions as _EC
+        from selenium.webdriver.chrome.options import Options as _Options
+        from selenium.webdriver.chrome.service import Service as _Service
+        from selenium.webdriver.common.action_chains import ActionChains as _ActionChains
+        from selenium.common import exceptions as _exceptions
+        # Publish everything else first: other threads treat webdriver being set as "loaded"
+        By, WebDriverWait, EC, Options, Service, ActionChains = (
+            _By, _WebDriverWait, _EC, _Options, _Service, _ActionChains)
+        TimeoutException = _exceptions.TimeoutException
+        NoSuchElementException = _exceptions.NoSuchElementException
+        WebDriverException = _exceptions.WebDriverException
+        webdriver = _webdriver
 
 # --- Configuration ---
 LOGIN_EMAIL_SELECTOR = "input[name='auth-username']"
 LOGIN_PASSWORD_SELECTOR = "input[name='auth-password']"
 LOGIN_SUBMIT_SELECTOR = "button[type='submit']"
+# Text of the offer region, for reading the issued code off the page
+PAGE_TEXT_SCRIPT = "return (document.querySelector('main') || document.body).innerText;"
+
+# Overridable so the benchmark harness can point the claimer at a local mock site
+BASE_URL = os.getenv('OCTOPUS_BASE_URL', "https://octopus.energy").rstrip('/')
+LOGIN_URL = os.getenv('OCTOPUS_LOGIN_URL', f"{BASE_URL}/login/")
+DASHBOARD_URL = os.getenv('OCTOPUS_DASHBOARD_URL', f"{BASE_URL}/dashboard/")
+OFFER_URL_TEMPLATE = os.getenv(
+    'OCTOPUS_OFFER_URL',
+    f"{BASE_URL}/dashboard/new/accounts/{{account_id}}/octoplus/partner/offers/{{slug}}"
+)
 
 # --- Script Settings ---
 OCTOPUS_EMAIL = os.getenv('OCTOPUS_EMAIL')
 OCTOPUS_PASSWORD = os.getenv('OCTOPUS_PASSWORD')
 ACCOUNT_ID = os.getenv('OCTOPUS_ACCOUNT_ID')
-STATE_FILE = os.path.join(os.path.dirname(__file__), 'last_claim.txt')
-
-# --- Validation ---
-if not all([OCTOPUS_EMAIL, OCTOPUS_PASSWORD, ACCOUNT_ID]):
-    raise ValueError("Missing required environment variables: OCTOPUS_EMAIL, OCTOPUS_PASSWORD, OCTOPUS_ACCOUNT_ID")
+STATE_FILE = os.getenv('OCTOPUS_STATE_FILE', os.path.join(os.path.dirname(__file__), 'last_claim.txt'))
+LOG_FILE = os.getenv('OCTOPUS_LOG_FILE', '/var/log/octopus-coffee.log')
+CLAIM_BACKEND = os.getenv('CLAIM_BACKEND', 'auto').lower()  # auto, http or selenium
 
 # --- Logging Setup ---
-log_dir = os.path.dirname('/var/log/octopus-coffee.log')
-if not os.path.exists(log_dir):
-    os.makedirs(log_dir, exist_ok=True)
-
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('/var/log/octopus-coffee.log'),
-        logging.StreamHandler()
-    ]
-)
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
 
-def setup_stealth_driver(retry_count=0):
-    """Setup Chrome to look like a real user with better stability"""
+def setup_logging(log_to_file=True):
+    """Log to the console, and to LOG_FILE once there is real work to record"""
+    root = logging.getLogger()
+    if not root.handlers:
+        logging.basicConfig(level=logging.INFO, format=LOG_FORMAT, handlers=[logging.StreamHandler()])
+    if log_to_file and not any(isinstance(h, logging.FileHandler) for h in root.handlers):
+        log_dir = os.path.dirname(LOG_FILE)
+        if not os.path.exists(log_dir):
+            os.makedirs(log_dir, exist_ok=True)
+        file_handler = logging.FileHandler(LOG_FILE)
+        file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        root.addHandler(file_handler)
+
+@timed("driver_setup")
+def setup_stealth_driver(retry_count=0, engine=None):
+    """Setup the configured browser engine to look like a real user with better stability"""
+    from run_budget import check_cancelled
+    check_cancelled()  # A cancelled run must not start replacement browsers
+    load_selenium()
+    from engines import select_engine
+    engine, binary, driver_path = select_engine(engine)
+    current_run().set("browser_engine", engine.name)
+    if engine.family == 'firefox':
+        return setup_firefox_driver(binary, driver_path)
     chrome_options = Options()
     
     # Essential stability options
-    chrome_options.add_argument("--headless=new")  # Use new headless mode
+    if engine.headless_flag:
+        chrome_options.add_argument(engine.headless_flag)  # chrome-headless-shell is headless already
     chrome_options.add_argument("--no-sandbox")
     chrome_options.add_argument("--disable-dev-shm-usage")
     chrome_options.add_argument("--disable-gpu")
@@ -67,10 +135,8 @@ def setup_stealth_driver(retry_count=0):
     
     # Memory and performance
     chrome_options.add_argument("--memory-pressure-off")
-    chrome_options.add_argument("--max_old_space_size=4096")
     chrome_options.add_argument("--disable-extensions")
     chrome_options.add_argument("--disable-plugins")
-    chrome_options.add_argument("--disable-images")
     
     # Anti-detection
     chrome_options.add_argument("--disable-blink-features=AutomationControlled")
@@ -93,60 +159,44 @@ def setup_stealth_driver(retry_count=0):
     chrome_options.add_argument("--lang=en-GB")
     chrome_options.add_argument("--accept-lang=en-GB,en;q=0.9")
     
-    # Temporary directory for this session
-    temp_dir = f"/tmp/chrome_temp_{os.getpid()}_{retry_count}"
+    # Record CDP network events so readiness waits can detect network idle
+    chrome_options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+    
+    # Fresh profile for this session, cloned from the template profile
+    from profiles import profile_manager
+    temp_dir = profile_manager().create()
     chrome_options.add_argument(f"--user-data-dir={temp_dir}")
     chrome_options.add_argument(f"--data-path={temp_dir}")
-    chrome_options.add_argument(f"--disk-cache-dir={temp_dir}/cache")
     
-    # Try to find Chrome/Chromium binary
-    possible_binaries = [
-        "/usr/bin/chromium-browser",
-        "/usr/bin/google-chrome",
-        "/usr/bin/chromium",
-        "/snap/bin/chromium",
-        "/usr/bin/google-chrome-stable"
-    ]
-    
-    chrome_binary = None
-    for binary in possible_binaries:
-        if os.path.exists(binary):
-            chrome_binary = binary
-            break
+    # Blocked images/fonts/trackers and a persistent, size-capped cache shared between runs
+    cache_lock = add_lean_options(chrome_options)
+    if cache_lock is None:
+        chrome_options.add_argument(f"--disk-cache-dir={temp_dir}/cache")
     
-    if chrome_binary:
-        chrome_options.binary_location = chrome_binary
-        logging.info(f"Using Chrome binary: {chrome_binary}")
-    
-    # Try to find chromedriver
-    possible_drivers = [
-        "/usr/bin/chromedriver",
-        "/usr/local/bin/chromedriver",
-        "/snap/bin/chromium.chromedriver"
-    ]
-    
-    driver_path = None
-    for driver in possible_drivers:
-        if os.path.exists(driver):
-            driver_path = driver
-            break
+    # Paths resolved (and version-checked) by the engine; None lets Selenium find them
+    if binary:
+        chrome_options.binary_location = binary
+        logging.info(f"Using {engine.name} binary: {binary}")
     
+    driver = None
     try:
+        # Tagged with this run so the watchdog can find its processes if it dies; webdriver.Chrome starts it
+        from run_budget import browser_env
         if driver_path:
-            service = Service(driver_path)
+            service = Service(driver_path, env=browser_env())
             logging.info(f"Using chromedriver: {driver_path}")
         else:
-            service = Service()  # Let selenium find it
+            service = Service(env=browser_env())  # Let selenium find it
             logging.info("Using system chromedriver")
         
-        # Set service timeout
-        service.start()
-        
         driver = webdriver.Chrome(service=service, options=chrome_options)
         
-        # Set timeouts
+        # Set timeouts (no implicit wait: explicit waits and the locator bound their own time)
         driver.set_page_load_timeout(30)
-        driver.implicitly_wait(10)
+        driver.implicitly_wait(0)
+        
+        hold_cache_slot(driver, cache_lock)
+        apply_resource_policy(driver)
         
         # Anti-detection script
         driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
@@ -154,391 +204,792 @@ def setup_stealth_driver(retry_count=0):
         # Test the driver
         driver.get("about:blank")
         
+        driver._profile_dir = temp_dir
         return driver
         
     except Exception as e:
         logging.error(f"Failed to setup Chrome driver (attempt {retry_count + 1}): {e}")
+        if driver is not None:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+        if getattr(driver, '_cache_slot', None) is not None:
+            release_cache_slot(driver)
+        elif cache_lock is not None:
+            os.close(cache_lock)  # The driver never took ownership of the slot
         
-        # Clean up temp directory
-        try:
-            import shutil
-            if os.path.exists(temp_dir):
-                shutil.rmtree(temp_dir)
-        except:
-            pass
+        # A profile from a browser that never started is not worth keeping
+        profile_manager().release(temp_dir, harvest=False)
             
         raise
 
+def setup_firefox_driver(binary, driver_path):
+    """Start headless Firefox through geckodriver with a throwaway profile"""
+    from selenium.webdriver.firefox.options import Options as FirefoxOptions
+    from selenium.webdriver.firefox.service import Service as FirefoxService
+    from profiles import profile_manager
+    from run_budget import browser_env
+
+    options = FirefoxOptions()
+    options.add_argument("-headless")
+    options.binary_location = binary
+    # Firefox profiles do not mix with the Chromium template, so start empty
+    profile_dir = profile_manager().create(use_template=False)
+    options.add_argument("-profile")
+    options.add_argument(profile_dir)
+    options.set_preference("intl.accept_languages", "en-GB,en")
+    options.set_preference("dom.webdriver.enabled", False)
+    if RESOURCE_POLICY != 'off':
+        # No CDP request blocking in Firefox; preferences cover images and web fonts
+        options.set_preference("permissions.default.image", 2)
+        options.set_preference("gfx.downloadable_fonts.enabled", False)
+
+    service = FirefoxService(driver_path, env=browser_env()) if driver_path else FirefoxService(env=browser_env())
+    try:
+        driver = webdriver.Firefox(service=service, options=options)
+        driver.set_window_size(1366, 768)
+        driver.set_page_load_timeout(30)
+        driver.implicitly_wait(0)
+        driver.get("about:blank")
+    except Exception as e:
+        logging.error(f"Failed to setup Firefox driver: {e}")
+        profile_manager().release(profile_dir, harvest=False)
+        raise
+    logging.info(f"Using firefox binary: {binary}")
+    driver._profile_dir = profile_dir
+    driver._profile_harvest = False
+    return driver
+
 def cleanup_temp_dirs():
-    """Clean up any leftover temporary directories"""
+    """Remove every browser profile this process created"""
+    if 'profiles' not in sys.modules:
+        return  # No browser was started, so there is nothing to clean up
     try:
-        import glob
-        import shutil
-        temp_pattern = f"/tmp/chrome_temp_{os.getpid()}_*"
-        for temp_dir in glob.glob(temp_pattern):
-            try:
-                shutil.rmtree(temp_dir)
-                logging.info(f"Cleaned up temp dir: {temp_dir}")
-            except:
-                pass
-    except:
-        pass
+        sys.modules['profiles'].profile_manager().release_all()
+    except Exception as e:
+        logging.debug(f"Could not clean up browser profiles: {e}")
+
+@contextmanager
+def fresh_browser_context(driver):
+    """Run the block in a brand-new incognito-style browser context on a warm driver"""
+    if not hasattr(driver, 'execute_cdp_cmd'):
+        # Firefox has no CDP browser contexts: clear the site's cookies and storage instead
+        driver.get(BASE_URL)
+        driver.delete_all_cookies()
+        driver.execute_script("window.localStorage.clear(); window.sessionStorage.clear();")
+        yield driver
+        return
+    original_handle = driver.current_window_handle
+    context_id = None
+    try:
+        context_id = driver.execute_cdp_cmd('Target.createBrowserContext', {})['browserContextId']
+        target_id = driver.execute_cdp_cmd('Target.createTarget', {
+            'url': 'about:blank',
+            'browserContextId': context_id,
+        })['targetId']
+        # chromedriver uses the target id as the window handle
+        driver.switch_to.window(target_id)
+        # CDP settings are per tab, so the new tab needs the resource policy too
+        apply_resource_policy(driver)
+    except WebDriverException as e:
+        # Older Chromium: fall back to wiping the shared context instead
+        logging.warning(f"⚠️  Could not create browser context, clearing cookies instead: {e}")
+        context_id = None
+        driver.execute_cdp_cmd('Network.clearBrowserCookies', {})
+        driver.execute_cdp_cmd('Storage.clearDataForOrigin', {'origin': BASE_URL, 'storageTypes': 'all'})
 
-def human_type(element, text, delay_range=(0.05, 0.15)):
-    """Type text like a human with random delays"""
-    element.clear()
-    time.sleep(random.uniform(0.1, 0.3))
-    for char in text:
-        element.send_keys(char)
-        time.sleep(random.uniform(*delay_range))
+    try:
+        yield driver
+    finally:
+        if context_id:
+            try:
+                driver.close()
+                driver.switch_to.window(original_handle)
+                driver.execute_cdp_cmd('Target.disposeBrowserContext', {'browserContextId': context_id})
+            except WebDriverException as e:
+                logging.warning(f"⚠️  Error disposing browser context: {e}")
 
 def human_wait(min_seconds=1, max_seconds=3):
     """Wait for a random human-like duration"""
     time.sleep(random.uniform(min_seconds, max_seconds))
 
-def login_to_octopus(driver, max_retries=3):
-    """Login to Octopus Energy account using stealth techniques"""
-    for attempt in range(max_retries):
+@timed("login")
+def login_to_octopus(driver, attempt=0, email=None, password=None):
+    """Login to Octopus Energy account using stealth techniques (one attempt; the caller retries)"""
+    email = email or OCTOPUS_EMAIL
+    password = password or OCTOPUS_PASSWORD
+    logging.info(f"Starting stealth login (attempt {attempt + 1})...")
+    # A retry may mean the form ignored the last input mode, so step down a level
+    input_mode = mode_for_attempt(attempt)
+
+    # Navigate to login page
+    driver.get(LOGIN_URL)
+    wait_for_page_load(driver, "Login page load", budget=5)
+
+    # Check if page loaded properly
+    if urlparse(LOGIN_URL).netloc not in driver.current_url:
+        raise Exception("Failed to load Octopus Energy login page")
+
+    # Find email field with multiple selectors (improved from working code)
+    email_selectors = [
+        "input[type='email']",
+        "input[name='auth-username']",
+    ]
+
+    email_field = None
+    for selector in email_selectors:
         try:
-            logging.info(f"Starting stealth login (attempt {attempt + 1}/{max_retries})...")
-            
-            # Navigate to login page
-            driver.get("https://octopus.energy/login/")
-            human_wait(3, 5)
-            
-            # Check if page loaded properly
-            if "octopus.energy" not in driver.current_url:
-                raise Exception("Failed to load Octopus Energy login page")
-
-            # Find email field with multiple selectors (improved from working code)
-            email_selectors = [
-                "input[type='email']",
-                "input[name='auth-username']",
-            ]
-            
-            email_field = None
-            for selector in email_selectors:
-                try:
-                    email_field = WebDriverWait(driver, 20).until(
-                        EC.presence_of_element_located((By.CSS_SELECTOR, selector))
-                    )
-                    logging.info(f"Found email field with selector: {selector}")
-                    break
-                except:
-                    continue
-            
-            if not email_field:
-                logging.error("Could not find email field")
-                continue
-
-            # Human-like interaction with email field
-            ActionChains(driver).move_to_element(email_field).click().perform()
-            human_wait(0.5, 1)
-            human_type(email_field, OCTOPUS_EMAIL)
-
-            # Find password field with multiple selectors (improved from working code)
-            password_selectors = [
-                "input[type='password']",
-                "input[name='auth-password']",
-            ]
-            
-            password_field = None
-            for selector in password_selectors:
-                try:
-                    password_field = driver.find_element(By.CSS_SELECTOR, selector)
-                    logging.info(f"Found password field with selector: {selector}")
-                    break
-                except:
-                    continue
-            
-            if not password_field:
-                logging.error("Could not find password field")
-                continue
-
-            # Human-like interaction with password field
-            ActionChains(driver).move_to_element(password_field).click().perform()
-            human_wait(0.5, 1)
-            human_type(password_field, OCTOPUS_PASSWORD)
-
-            # Find and click submit button with multiple selectors
-            submit_selectors = [
-                "button[type='submit']",
-                "input[type='submit']"
-            ]
-            
-            submit_btn = None
-            for selector in submit_selectors:
-                try:
-                    submit_btn = WebDriverWait(driver, 15).until(
-                        EC.element_to_be_clickable((By.CSS_SELECTOR, selector))
-                    )
-                    break
-                except:
-                    continue
-            
-            if not submit_btn:
-                logging.error("Could not find submit button")
-                continue
+            email_field = WebDriverWait(driver, 20).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, selector))
+            )
+            logging.info(f"Found email field with selector: {selector}")
+            break
+        except:
+            continue
 
-            # Human-like click on submit
-            ActionChains(driver).move_to_element(submit_btn).pause(random.uniform(0.5, 1.5)).click().perform()
-            logging.info("Clicked login button")
-            
-            # Wait for successful login with improved check (from working code)
-            for i in range(15):
-                human_wait(1, 2)
-                if "dashboard" in driver.current_url:
-                    logging.info("✅ Login successful")
-                    return True
-                elif "login" in driver.current_url and i > 5:
-                    logging.warning("Still on login page - login may have failed")
-                    break
-            
-            if attempt < max_retries - 1:
-                logging.warning(f"Login attempt {attempt + 1} failed, retrying...")
-                human_wait(5, 10)
-                continue
-            else:
-                logging.error(f"❌ Login failed after {max_retries} attempts")
-                return False
-                
-        except TimeoutException as e:
-            logging.warning(f"⚠️  Login timeout on attempt {attempt + 1}: {e}")
-            if attempt < max_retries - 1:
-                human_wait(5, 10)
-                continue
-            else:
-                logging.error(f"❌ Login failed after {max_retries} attempts")
-                return False
-                
+    if not email_field:
+        logging.error("Could not find email field")
+        return False
+
+    # Human-like interaction with email field
+    ActionChains(driver).move_to_element(email_field).click().perform()
+    human_wait(0.5, 1)
+    with current_run().span("login_typing"):
+        if not fill_field(driver, email_field, email, "email", input_mode):
+            logging.error("Could not fill email field")
+            return False
+
+    # Find password field with multiple selectors (improved from working code)
+    password_selectors = [
+        "input[type='password']",
+        "input[name='auth-password']",
+    ]
+
+    password_field = None
+    for selector in password_selectors:
+        try:
+            password_field = driver.find_element(By.CSS_SELECTOR, selector)
+            logging.info(f"Found password field with selector: {selector}")
+            break
+        except:
+            continue
+
+    if not password_field:
+        logging.error("Could not find password field")
+        return False
+
+    # Human-like interaction with password field
+    ActionChains(driver).move_to_element(password_field).click().perform()
+    human_wait(0.5, 1)
+    with current_run().span("login_typing"):
+        if not fill_field(driver, password_field, password, "password", input_mode):
+            logging.error("Could not fill password field")
+            return False
+
+    # Find and click submit button with multiple selectors
+    submit_selectors = [
+        "button[type='submit']",
+        "input[type='submit']"
+    ]
+
+    submit_btn = None
+    for selector in submit_selectors:
+        try:
+            submit_btn = WebDriverWait(driver, 15).until(
+                EC.element_to_be_clickable((By.CSS_SELECTOR, selector))
+            )
+            break
+        except:
+            continue
+
+    if not submit_btn:
+        logging.error("Could not find submit button")
+        return False
+
+    # Human-like click on submit
+    ActionChains(driver).move_to_element(submit_btn).pause(random.uniform(0.5, 1.5)).click().perform()
+    logging.info("Clicked login button")
+
+    # Wait for the redirect to the dashboard
+    if wait_for(driver, url_contains("dashboard"), "Login redirect", timeout=15, budget=30):
+        logging.info("✅ Login successful")
+        return True
+    logging.warning("Still on login page - login may have failed")
+    return False
+
+def ensure_logged_in(driver, session_store, email=None, password=None, attempt=0):
+    """Reuse a saved session if the dashboard still accepts it, otherwise do the full login"""
+    # A retry means the last try did not get us in, so go straight to the login form
+    if attempt == 0 and session_store.is_valid(DASHBOARD_URL):
+        try:
+            session_store.restore(driver, BASE_URL)
+            # The dashboard accepted the cookies over plain HTTP; make sure the browser is let in too
+            driver.get(DASHBOARD_URL)
+            # Checked on the path: the login page's ?next=/dashboard/ would satisfy url_contains
+            on_dashboard = lambda d: "dashboard" in urlparse(d.current_url).path
+            if wait_for(driver, on_dashboard, "Restored session", timeout=10):
+                session_store.record_reuse()
+                logging.info("♻️  Reusing saved session, skipping login")
+                current_run().set("session", "reused")
+                return True
+            logging.warning("⚠️  Browser was sent to the login page with the saved session; logging in instead")
+            session_store.clear()  # Otherwise every run would trip over it until the TTL runs out
         except WebDriverException as e:
-            logging.warning(f"⚠️  WebDriver error on attempt {attempt + 1}: {e}")
-            if attempt < max_retries - 1:
-                human_wait(5, 10)
-                continue
-            else:
-                logging.error(f"❌ Login failed after {max_retries} attempts due to WebDriver errors")
-                return False
-                
-        except Exception as e:
-            logging.error(f"❌ Login failed on attempt {attempt + 1}: {e}")
-            if attempt < max_retries - 1:
-                human_wait(5, 10)
-                continue
-            else:
-                return False
-    
+            logging.warning(f"⚠️  Could not restore saved session: {e}")
+
+    current_run().set("session", "login")
+    if login_to_octopus(driver, attempt, email=email, password=password):
+        session_store.save(driver)
+        session_store.record_login()
+        return True
     return False
 
-def activate_caffe_nero_offer(driver):
-    """Navigate to Caffè Nero offer page and activate the offer"""
+def driver_healthy(driver):
+    """True if the browser still answers a trivial script"""
+    if driver is None:
+        return False
     try:
-        offer_url = f"https://octopus.energy/dashboard/new/accounts/{ACCOUNT_ID}/octoplus/partner/offers/caffe-nero"
-        logging.info("Navigating to Caffè Nero offer page...")
-        driver.get(offer_url)
-        human_wait(3, 5)
-
-        # Check if offer is available (improved from working code)
-        page_text = driver.page_source.lower()
-        unavailable_phrases = [
-            "more codes tomorrow",
-            "can't be claimed at the moment",
-            "no codes available",
-            "try again tomorrow",
-            "already activated",
-            "offer activated"
-        ]
-        
-        if any(phrase in page_text for phrase in unavailable_phrases):
-            logging.info("ℹ️  Offer not available today or already activated. Will try again tomorrow.")
-            return False
+        driver.execute_script("return 1")
+        return True
+    except Exception:
+        return False
 
-        # Improved button finding logic from working code
-        activate_selectors = [
-            # XPath selectors for text matching (improved to handle nested spans)
-            "//button[.//span[contains(text(), 'Activate offer')]]",
-            "//button[contains(text(), 'Activate offer')]",
-            "//button[.//span[contains(text(), 'Activate')]]",
-            "//button[contains(text(), 'Activate')]",
-            "//a[contains(text(), 'Activate offer')]",
-            "//a[contains(text(), 'Activate')]",
-            # CSS selectors for common button patterns
-            "button[class*='activate']",
-            "a[class*='activate']",
-            "button[class*='fPxMrc']",  # Using the class from the HTML image
-            # Generic button selectors as fallback
-            "button[type='submit']",
-            "button[class*='primary']",
-            "button[class*='cta']",
-            "button[tabindex='0'][type='button']"
-        ]
-        
-        activate_button = None
-        
-        # Try each selector with improved error handling
-        for selector in activate_selectors:
-            try:
-                if selector.startswith("//"):
-                    # XPath selector
-                    activate_button = WebDriverWait(driver, 10).until(
-                        EC.element_to_be_clickable((By.XPATH, selector))
-                    )
-                else:
-                    # CSS selector
-                    activate_button = WebDriverWait(driver, 10).until(
-                        EC.element_to_be_clickable((By.CSS_SELECTOR, selector))
-                    )
-                
-                logging.info(f"Found activate button with selector: {selector}")
-                break
-            except TimeoutException:
-                continue
-        
-        # Last resort - find all buttons and look for relevant text (from working code)
-        if not activate_button:
-            try:
-                logging.info("Trying fallback method - searching all buttons and links...")
-                all_buttons = driver.find_elements(By.TAG_NAME, "button")
-                all_links = driver.find_elements(By.TAG_NAME, "a")
-                
-                for element in all_buttons + all_links:
-                    element_text = element.text.lower()
-                    if any(word in element_text for word in ["activate", "claim", "get"]):
-                        activate_button = element
-                        logging.info(f"Found button by text content: '{element.text}'")
-                        break
-            except Exception as fallback_error:
-                logging.warning(f"Fallback method failed: {fallback_error}")
-        
+@timed("activate")
+def activate_offer(driver, offer, account_id=None, checkpoint=None):
+    """Load an offer's page, activate it and verify, resuming from the checkpoint's last good phase"""
+    from run_budget import RunBudgetExceeded
+    checkpoint = checkpoint or Checkpoint()
+    name = offer['name']
+    slug = offer['slug']
+    locator_key = f"activate button ({slug})"
+    offer_url = OFFER_URL_TEMPLATE.format(account_id=account_id or ACCOUNT_ID, slug=slug)
+    run = current_run()
+    driver_dead = lambda: not driver_healthy(driver)
+    clicked_at = []  # Request log position at each click
+
+    def read_state(after_click=False, timeout=CLASSIFY_TIMEOUT):
+        # Classified in the page: returns once the offer shows a final state
+        state, evidence = classify_offer(driver, after_click=after_click, timeout=timeout, budget=5,
+                                         phrases=offer['phrases'])
+        run.set("offer_state", state)
+        run.set("offer_evidence", evidence)
+        return state
+
+    def load_page(attempt):
+        logging.info(f"Navigating to {name} offer page...")
+        with run.span("offer_page_load"):
+            driver.get(offer_url)
+            state = read_state()
+        if state == UNKNOWN:
+            # Nothing the phrases describe; one short look for a button the selectors know
+            button, _ = find_best_element(driver, locator_key, offer['selectors'],
+                                          text_words=offer['text_words'], timeout=1)
+            return ACTIONABLE if button else None
+        return state
+
+    def click(attempt):
+        # Evaluate every selector plus a button/link text fallback in one pass per poll
+        with run.span("selector_search"):
+            activate_button, selector = find_best_element(driver, locator_key, offer['selectors'],
+                                                          text_words=offer['text_words'])
+        run.set("activate_selector", selector)
         if not activate_button:
-            logging.error("❌ Could not find activate button")
-            # Log page source snippet for debugging
-            logging.debug("Page source snippet for debugging:")
-            logging.debug(driver.page_source[:2000])
+            run.set("offer_state", "button_missing")
+            logging.error(f"❌ Could not find {name} activate button")
+            if logging.getLogger().isEnabledFor(logging.DEBUG):
+                logging.debug("Page source snippet for debugging:")
+                logging.debug(driver.page_source[:2000])
             return False
-        
-        # Human-like click on activate button
+        # Human-like click on activate button, watching the network for the request it sends
+        clicked_at.append(mark_requests(driver))
         ActionChains(driver).move_to_element(activate_button).pause(random.uniform(0.5, 1.5)).click().perform()
-        logging.info("🎯 Clicked activate offer button!")
-        human_wait(3, 5)
-        
-        # Check for success indicators (improved from working code)
-        success_indicators = [
-            "offer activated",
-            "successfully activated", 
-            "code has been sent",
-            "enjoy your coffee",
-            "code:",
-            "your code",
-            "redeem"
-        ]
-        
-        updated_page_text = driver.page_source.lower()
-        if any(indicator in updated_page_text for indicator in success_indicators):
-            logging.info("✅ Successfully activated today's Caffè Nero offer!")
-            return True
-        else:
-            logging.info("✅ Activate button clicked - offer processing")
-            return True  # Assume success if button was clicked
-            
-    except Exception as e:
-        logging.error(f"❌ Failed to activate Caffè Nero offer: {e}")
-        return False
+        checkpoint.clicked.add(slug)
+        logging.info(f"🎯 Clicked {name} activate offer button!")
+        return True
+
+    def clicked_already():
+        # A click that raised may still have gone through
+        return read_state(after_click=True, timeout=1) in (ACTIVATED, ALREADY_ACTIVATED)
+
+    def confirmation(attempt):
+        if attempt:
+            # The confirmation never showed, so reload and read the offer's state afresh
+            driver.get(offer_url)
+        with run.span("post_click_check"):
+            # The activation response answers as soon as it arrives; the page is the fallback
+            answer = confirm_activation(driver, offer, clicked_at[-1]) if clicked_at and not attempt else None
+            if answer:
+                state, evidence, code = answer
+                run.set("offer_state", state)
+                run.set("offer_evidence", evidence)
+                run.set("confirmed_by", "network")
+                if code:
+                    run.codes[slug] = code
+            else:
+                state = read_state(after_click=True, timeout=10)
+                run.set("confirmed_by", "page")
+        # A button that is still showing or an unreadable page is not an answer yet
+        return state if state not in (ACTIONABLE, UNKNOWN) else None
 
-def has_claimed_this_week():
-    """Check the state file to see if a claim has been made this week (since Monday)."""
-    if not os.path.exists(STATE_FILE):
-        return False
-    
     try:
-        with open(STATE_FILE, 'r') as f:
-            last_claim_str = f.read().strip()
-        
-        if not last_claim_str:
-            return False
-            
-        last_claim_date = datetime.fromisoformat(last_claim_str).date()
-        today = date.today()
-        start_of_week = today - timedelta(days=today.weekday())  # Monday is 0
-        
-        if last_claim_date >= start_of_week:
-            logging.info(f"✅ Already claimed this week on {last_claim_date}. No action needed.")
+        state = run_phase(checkpoint, OFFER_LOADED, load_page, abort_if=driver_dead)
+        if state == ALREADY_ACTIVATED and slug in checkpoint.clicked:
+            logging.info(f"✅ {name} offer shows as activated after this run's earlier click")
             return True
+        if state == UNAVAILABLE:
+            logging.info(f"ℹ️  No {name} codes available today ('{run.fields.get('offer_evidence')}'). "
+                         f"Will try again tomorrow.")
+            return False
+        if state == ALREADY_ACTIVATED:
+            logging.info(f"ℹ️  {name} offer already activated ('{run.fields.get('offer_evidence')}'). Nothing to do.")
+            return False
+
+        run_phase(checkpoint, OFFER_ACTIVATED, click, check=clicked_already, abort_if=driver_dead)
+        state = run_phase(checkpoint, VERIFIED, confirmation, abort_if=driver_dead)
+
+    except PhaseFailed as e:
+        if driver_dead():
+            raise  # The caller replaces the browser and resumes this offer
+        logging.error(f"❌ {name}: {e} (page state: {run.fields.get('offer_state')})")
         return False
-        
-    except (ValueError, OSError) as e:
-        logging.warning(f"⚠️  Could not read state file: {e}")
+    except RunBudgetExceeded:
+        raise  # The run is cancelled: main()/claim_account record it as over_budget, not as a failed offer
+    except Exception as e:
+        logging.error(f"❌ Failed to activate {name} offer: {e}")
         return False
 
-def record_successful_claim():
-    """Write the current timestamp to the state file."""
+    evidence = run.fields.get("offer_evidence")
+    if state == ACTIVATED or state == ALREADY_ACTIVATED:
+        if slug not in run.codes:
+            try:
+                code = extract_code(driver.execute_script(PAGE_TEXT_SCRIPT))
+                if code:
+                    run.codes[slug] = code
+            except Exception as e:
+                logging.debug(f"Could not read the offer code from the page: {e}")
+        if slug in run.codes:
+            logging.info(f"🎟️  {name} code: {run.codes[slug]}")
+        logging.info(f"✅ Successfully activated today's {name} offer! ('{evidence}')")
+        return True
+    logging.warning(f"⚠️  {name} offer refused after the click: {state} ('{evidence}')")
+    return False
+
+def claim_offers(driver, checkpoint, session_store, offers, account, outcomes):
+    """Log in (unless the checkpoint is past it) and work through the offers missing from outcomes"""
+    run = current_run()
+    run_phase(checkpoint, AUTHENTICATED,
+              lambda attempt: ensure_logged_in(driver, session_store, account['email'], account['password'], attempt),
+              check=lambda: "dashboard" in driver.current_url,
+              abort_if=lambda: not driver_healthy(driver))
+    for offer in offers:
+        if offer['slug'] in outcomes:
+            continue
+        run.set("offer_state", None)
+        with run.span(f"offer_{offer['slug']}"):
+            result = activate_offer(driver, offer, account['account_id'], checkpoint)
+        outcomes[offer['slug']] = run_outcome(result)
+        # The next offer starts again from its own page load
+        checkpoint.rewind(OFFER_LOADED)
+    return outcomes
+
+def offers_due(account_id=None, state_file=STATE_FILE):
+    """Return the catalog offers not yet claimed this week (or today, for daily offers)."""
+    account_id = account_id or ACCOUNT_ID
+    store = default_store()
+    offers = load_offers()
     try:
-        # Ensure directory exists
-        state_dir = os.path.dirname(STATE_FILE)
-        if state_dir and not os.path.exists(state_dir):
-            os.makedirs(state_dir, exist_ok=True)
-            
-        with open(STATE_FILE, 'w') as f:
-            f.write(datetime.now().isoformat())
-        logging.info(f"📝 Recorded successful claim in {STATE_FILE}")
+        # Pick up a last_claim.txt left by older versions (only the first time)
+        store.migrate_state_file(state_file, account_id)
+        due = due_offers(store, account_id, offers)
+        if not due:
+            claimed = ", ".join(f"{offer['name']} on {store.last_claim(account_id, offer['slug']).date()}"
+                                for offer in offers)
+            logging.info(f"✅ Already claimed {claimed}. No action needed.")
+        return due
         
-    except OSError as e:
-        logging.error(f"❌ Failed to record claim: {e}")
+    except sqlite3.Error as e:
+        logging.warning(f"⚠️  Could not read claim history: {e}")
+        return offers
 
-def main():
-    """Main execution with weekly claim logic and retry mechanism."""
-    if has_claimed_this_week():
-        return  # Exit if we've already claimed this week
+def record_claim_attempt(account_id, outcome, offer=DEFAULT_OFFER):
+    """Store an offer's outcome, observed page state, issued code and this run's phase timings in the claim history."""
+    page_state = ACTIVATED if outcome == "claimed" else (None if outcome == "failed" else outcome)
+    run = current_run()
+    record_attempt(account_id, outcome, offer=offer, page_state=page_state, timings=run.phases,
+                   code=run.codes.get(offer))
+    if outcome == "claimed":
+        logging.info(f"📝 Recorded successful {offer} claim in {HISTORY_DB}")
 
-    logging.info("🚀 Starting weekly Caffè Nero claim attempt...")
-    
-    max_driver_retries = 3
-    driver = None
-    
-    for driver_attempt in range(max_driver_retries):
+def log_session_stats(session_store):
+    """Log how often a saved session saved us a full login"""
+    stats = session_store.stats()
+    logging.info(f"📊 Session stats: {stats['reused']} runs reused a session, {stats['logins']} needed a full login")
+
+def close_driver(driver):
+    """Record the browser's resource use, quit it and remove its profile"""
+    if driver:
         try:
-            logging.info(f"Setting up driver (attempt {driver_attempt + 1}/{max_driver_retries})...")
-            driver = setup_stealth_driver(driver_attempt)
-            
-            if login_to_octopus(driver):
-                if activate_caffe_nero_offer(driver):
-                    record_successful_claim()
-                    logging.info("✅ Claim process completed successfully for the week.")
-                    return  # Success, exit
-                else:
-                    logging.info("❌ Claim attempt failed, will retry on the next run.")
-                    return  # Login worked but claim failed, don't retry driver
-            else:
-                logging.error("❌ Login failed")
-                # Continue to retry with new driver
-                
-        except WebDriverException as e:
-            logging.error(f"❌ WebDriver error on attempt {driver_attempt + 1}: {e}")
-            if driver_attempt < max_driver_retries - 1:
-                logging.info("Retrying with new driver...")
-                time.sleep(10)  # Wait before retry
-            
+            current_run().set("resources", resource_usage(driver))
         except Exception as e:
-            logging.error(f"❌ Unexpected error on attempt {driver_attempt + 1}: {e}")
-            if driver_attempt < max_driver_retries - 1:
-                logging.info("Retrying with new driver...")
-                time.sleep(10)
-                
-        finally:
-            if driver:
-                try:
-                    driver.quit()
-                except Exception as e:
-                    logging.warning(f"⚠️  Error closing driver: {e}")
+            logging.debug(f"Could not collect resource usage: {e}")
+        try:
+            driver.quit()
+        except Exception as e:
+            logging.warning(f"⚠️  Error closing driver: {e}")
+        release_cache_slot(driver)
+        profile_dir = getattr(driver, '_profile_dir', None)
+        if profile_dir:
+            from profiles import profile_manager
+            profile_manager().release(profile_dir, harvest=getattr(driver, '_profile_harvest', True))
+
+def claim_with_selenium(session_store, offers, account):
+    """Drive a real browser through one login and every offer; returns {slug: outcome}.
+
+    Each phase retries on the same driver. Only a driver that has died is
+    replaced, and the new one resumes at the offer that was in progress.
+    """
+    checkpoint = Checkpoint()
+    outcomes = {}
+    driver = None
+    try:
+        for driver_start in range(POLICIES[DRIVER_READY].attempts):
+            try:
+                if driver is None:
+                    logging.info("Setting up driver...")
+                    driver = run_phase(checkpoint, DRIVER_READY, setup_stealth_driver)
+                return claim_offers(driver, checkpoint, session_store, offers, account, outcomes)
+            except PhaseFailed as e:
+                if e.phase == DRIVER_READY or driver_healthy(driver):
+                    logging.error(f"❌ {e}")
+                    break
+                logging.warning(f"⚠️  Browser died after the {checkpoint.last_phase} phase, "
+                                f"restarting it and resuming")
+                current_run().incr("driver_retries")
+                close_driver(driver)
                 driver = None
-            
-            # Clean up temp directories
-            cleanup_temp_dirs()
-    
-    logging.error(f"❌ Failed after {max_driver_retries} driver attempts")
+                checkpoint.rewind(DRIVER_READY)
+    finally:
+        close_driver(driver)
+
+    for offer in offers:
+        outcomes.setdefault(offer['slug'], "failed")
+    return outcomes
+
+class SeleniumBackend:
+    """Claim the offers by driving a real Chromium"""
+
+    name = "selenium"
+
+    def __init__(self, session_store, account):
+        self.session_store = session_store
+        self.account = account
+
+    def claim(self, offers):
+        return claim_with_selenium(self.session_store, offers, self.account)
+
+class PooledSeleniumBackend:
+    """Claim the offers in a fresh context of a driver borrowed from a pool or warm daemon"""
+
+    name = "selenium"
+
+    def __init__(self, session_store, account, driver_pool):
+        self.session_store = session_store
+        self.account = account
+        self.driver_pool = driver_pool
+
+    def claim(self, offers):
+        run = current_run()
+        outcomes = {}
+        with self.driver_pool.driver() as driver:
+            with fresh_browser_context(driver):
+                event_log(driver).reset_counters()  # Drop counts left over from the previous job
+                checkpoint = Checkpoint()
+                checkpoint.mark(DRIVER_READY, driver)  # The pool only hands out healthy drivers
+                try:
+                    claim_offers(driver, checkpoint, self.session_store, offers, self.account, outcomes)
+                except PhaseFailed as e:
+                    logging.error(f"❌ [{self.account['name']}] {e}")
+                finally:
+                    run.set("resources", resource_usage(driver))
+        for offer in offers:
+            outcomes.setdefault(offer['slug'], "failed")
+        return outcomes
+
+def get_claim_backends(session_store, account, driver_pool=None):
+    """Build the backends to try, cheapest first, according to CLAIM_BACKEND"""
+    from http_backend import HttpBackend
+    backends = []
+    if CLAIM_BACKEND in ('auto', 'http'):
+        backends.append(HttpBackend(BASE_URL, account['email'], account['password'], account['account_id'],
+                                    session_store=session_store, login_url=LOGIN_URL,
+                                    dashboard_url=DASHBOARD_URL, offer_url_template=OFFER_URL_TEMPLATE))
+    if CLAIM_BACKEND in ('auto', 'selenium'):
+        if driver_pool:
+            backends.append(PooledSeleniumBackend(session_store, account, driver_pool))
+        else:
+            backends.append(SeleniumBackend(session_store, account))
+    return backends
+
+def claim_due_offers(backends, offers):
+    """Try each backend in turn on the offers still unresolved; returns {slug: outcome}"""
+    run = current_run()
+    outcomes = {}
+    pending = offers
+    for backend in backends:
+        logging.info(f"Trying {backend.name} backend...")
+        run.set("backend", backend.name)
+        with run.span(f"backend_{backend.name}"):
+            outcomes.update(backend.claim(pending))
+        pending = [offer for offer in pending if offer['slug'] not in outcomes]
+        if not pending:
+            break
+        logging.info(f"{backend.name} backend could not finish {', '.join(o['slug'] for o in pending)}, falling back...")
+    for offer in pending:
+        outcomes[offer['slug']] = "failed"
+    run.set("offers", outcomes)
+    return outcomes
+
+def overall_outcome(outcomes):
+    """One outcome for the run: claimed if any offer was, else the first offer's outcome"""
+    if "claimed" in outcomes.values():
+        return "claimed"
+    return next(iter(outcomes.values()), "failed")
+
+def claim_account(account, driver_pool):
+    """Claim the due offers for one account from the accounts file, borrowing a pooled driver if needed"""
+    name = account['name']
+    account_id = account['account_id']
+    run = start_run(account=account_id)
+    if not offers_due(account_id, account['state_file']):
+        run.emit("already_claimed")
+        return True
+
+    from run_budget import check_cancelled, RunBudgetExceeded
+    try:
+        check_cancelled()  # Accounts still queued when the run is cancelled are not started
+        with default_store().claim_lease(account_id) as acquired:
+            if not acquired:
+                logging.info(f"ℹ️  [{name}] Another process is already claiming for this account")
+                run.emit("locked")
+                return False
+            # Re-check now that we hold the lease; another process may have just finished
+            due = offers_due(account_id, account['state_file'])
+            if not due:
+                run.emit("already_claimed")
+                return True
+
+            logging.info(f"🚀 [{name}] Starting claim attempt for {', '.join(offer['name'] for offer in due)}...")
+            from session_store import SessionStore
+            session_store = SessionStore(account['session_file'])
+            outcomes = claim_due_offers(get_claim_backends(session_store, account, driver_pool), due)
+            for slug, outcome in outcomes.items():
+                record_claim_attempt(account_id, outcome, slug)
+    except RunBudgetExceeded as e:
+        logging.error(f"❌ [{name}] Claim stopped by the watchdog: {e}")
+        run.emit("over_budget")
+        return False
+
+    claimed = all(outcome == "claimed" for outcome in outcomes.values())
+    if claimed:
+        logging.info(f"✅ [{name}] All due offers claimed.")
+    else:
+        logging.info(f"❌ [{name}] Not every offer was claimed ({outcomes}), will retry on the next run.")
+    run.emit(overall_outcome(outcomes))
+    return claimed
+
+def run_multi_account(accounts_file, concurrency=None):
+    """Claim for every account in the accounts file using a shared driver pool"""
+    from multi_account import load_accounts, DriverPool, run_accounts
+    accounts, configured_concurrency = load_accounts(accounts_file)
+    concurrency = concurrency or configured_concurrency
+    logging.info(f"Claiming for {len(accounts)} accounts with concurrency {concurrency}")
+
+    from run_budget import RunWatchdog, RunBudgetExceeded
+    # Summarises the whole run (process tree, accounts claimed); each account also emits its own record
+    run = start_run(accounts=len(accounts))
+    driver_pool = DriverPool(setup_stealth_driver, size=min(concurrency, len(accounts)))
+    outcome = "failed"
+    try:
+        with RunWatchdog(run):
+            try:
+                results = run_accounts(accounts, concurrency, lambda account: claim_account(account, driver_pool))
+            finally:
+                driver_pool.close()
+                cleanup_temp_dirs()
+        run.set("accounts_claimed", sum(1 for result in results.values() if result))
+        outcome = "claimed" if all(results.values()) else "failed"
+        return results
+    except RunBudgetExceeded as e:
+        logging.error(f"❌ Multi-account run stopped by the watchdog: {e}")
+        outcome = "over_budget"
+        return None
+    finally:
+        run.emit(outcome)
+
+def env_account():
+    """The single account configured through the environment, as an accounts-file entry"""
+    from session_store import SESSION_FILE
+    return {
+        'name': ACCOUNT_ID,
+        'email': OCTOPUS_EMAIL,
+        'password': OCTOPUS_PASSWORD,
+        'account_id': ACCOUNT_ID,
+        'state_file': STATE_FILE,
+        'session_file': SESSION_FILE,
+    }
+
+def run_daemon(accounts_file=None):
+    """Keep a browser warm and serve claim jobs from run.sh --client"""
+    from daemon import WarmBrowser, ClaimDaemon
+    from multi_account import load_accounts
+    if accounts_file:
+        accounts, _ = load_accounts(accounts_file)
+    else:
+        validate_config()
+        accounts = [env_account()]
+    warm_browser = WarmBrowser(setup_stealth_driver, cleanup=cleanup_temp_dirs)
+    ClaimDaemon(warm_browser, accounts, claim_account).serve()
+
+def run_client(accounts_file=None, concurrency=None):
+    """Hand the claim to the daemon, or run it here if no daemon is listening"""
+    from daemon import send_job
+    response = send_job({'command': 'claim'})
+    if response is None:
+        logging.info("No claim daemon running, claiming in this process")
+        if accounts_file:
+            run_multi_account(accounts_file, concurrency)
+        else:
+            main()
+        return
+    if not response.get('ok'):
+        logging.error(f"❌ Daemon error: {response.get('error')}")
+        sys.exit(1)
+    for name, claimed in response['results'].items():
+        status = "claimed this week" if claimed else "not claimed yet"
+        logging.info(f"[{name}] {status}")
+    logging.info(f"Daemon finished in {response['seconds']}s")
+
+def validate_config():
+    """Make sure the single-account settings are present"""
+    if not all([OCTOPUS_EMAIL, OCTOPUS_PASSWORD, ACCOUNT_ID]):
+        raise ValueError("Missing required environment variables: OCTOPUS_EMAIL, OCTOPUS_PASSWORD, OCTOPUS_ACCOUNT_ID")
+
+def main():
+    """Main execution with weekly claim logic and retry mechanism."""
+    validate_config()
+    run = start_run(account=ACCOUNT_ID)
+    if not offers_due():
+        # Exit if every offer is already claimed; the metrics record (outcome and total time) is the only write
+        run.emit("already_claimed")
+        return "already_claimed"
+
+    setup_logging()
+    from run_budget import RunWatchdog, RunBudgetExceeded
+    try:
+        with RunWatchdog(run), default_store().claim_lease(ACCOUNT_ID) as acquired:
+            if not acquired:
+                logging.info("ℹ️  Another process is already claiming for this account")
+                run.emit("locked")
+                return "locked"
+            # Re-check now that we hold the lease; another process may have just finished
+            due = offers_due()
+            if not due:
+                run.emit("already_claimed")
+                return "already_claimed"
+
+            logging.info(f"🚀 Starting claim attempt for {', '.join(offer['name'] for offer in due)}...")
+            from session_store import SessionStore
+            session_store = SessionStore()
+        
+            outcomes = claim_due_offers(get_claim_backends(session_store, env_account()), due)
+            for slug, outcome in outcomes.items():
+                record_claim_attempt(ACCOUNT_ID, outcome, slug)
+    except RunBudgetExceeded as e:
+        logging.error(f"❌ Claim run stopped by the watchdog: {e}")
+        run.emit("over_budget")
+        return "over_budget"
+
+    if all(outcome == "claimed" for outcome in outcomes.values()):
+        logging.info("✅ Claim process completed successfully for every due offer.")
+    else:
+        logging.info(f"❌ Not every offer was claimed ({outcomes}), will retry on the next run.")
+    log_session_stats(session_store)
+    outcome = overall_outcome(outcomes)
+    run.emit(outcome)
+    return outcome
+
+def run_smart_schedule():
+    """Stay running and attempt claims around the learned code-release window"""
+    from smart_schedule import run_scheduler
+    validate_config()
+    run_scheduler(
+        claim_once=main,
+        claimed_this_week=lambda: not offers_due(),
+        load_history=lambda: load_attempts(ACCOUNT_ID),
+    )
+
+def show_status():
+    """Print the last claim and recent attempts from the claim history"""
+    store = default_store()
+    accounts = [row[0] for row in store.db.execute("SELECT DISTINCT account FROM attempts ORDER BY account")]
+    if not accounts:
+        print("No claim attempts recorded yet.")
+    offers = load_offers()
+    for account in accounts:
+        print(f"{account}:")
+        for offer in offers:
+            last_claim = store.last_claim(account, offer['slug'])
+            code = store.last_code(account, offer['slug'])
+            print(f"  {offer['name']}: last claim {last_claim:%a %d %b %Y %H:%M}" + (f", code {code}" if code else "")
+                  if last_claim else f"  {offer['name']}: never claimed")
+            for when, outcome in store.load_attempts(account, offer['slug'])[-5:]:
+                print(f"      {when:%a %d %b %H:%M}  {outcome}")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Claim the Octoplus partner offers (Caffè Nero by default)")
+    parser.add_argument('--accounts', metavar='FILE',
+                        help="TOML/YAML file listing several accounts to claim for")
+    parser.add_argument('--concurrency', type=int,
+                        help="How many accounts to claim at once (overrides the accounts file)")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--daemon', action='store_true',
+                      help="Keep a browser warm and serve claim jobs on a Unix socket")
+    mode.add_argument('--client', action='store_true',
+                      help="Send the claim to a running daemon (falls back to claiming here)")
+    mode.add_argument('--schedule', action='store_true',
+                      help="Stay running and time attempts around the learned code-release window")
+    mode.add_argument('--status', action='store_true',
+                      help="Show the last claim and recent attempts, then exit")
+    parser.add_argument('--profile', action='store_true',
+                        help="Trace every WebDriver command, write a trace file and print the slowest commands")
+    parser.add_argument('--profile-python', action='store_true',
+                        help="Like --profile, and also run cProfile over the Python side")
+    return parser.parse_args(argv)
 
 if __name__ == "__main__":
+    args = parse_args()
+    # The default cron run only opens the log file if it has a claim to attempt
+    plain_run = not (args.status or args.daemon or args.client or args.schedule or args.accounts)
+    setup_logging(log_to_file=not plain_run)
+    tracer = None
+    if args.profile or args.profile_python:
+        from command_trace import CommandTracer
+        tracer = CommandTracer(python=args.profile_python).start()
     try:
-        main()
+        if args.status:
+            show_status()
+        elif args.daemon:
+            run_daemon(args.accounts)
+        elif args.client:
+            run_client(args.accounts, args.concurrency)
+        elif args.schedule:
+            run_smart_schedule()
+        elif args.accounts:
+            run_multi_account(args.accounts, args.concurrency)
+        else:
+            main()
     finally:
         cleanup_temp_dirs()
+        if tracer:
+            tracer.stop()
@@ -0,0 +1,143 @@
+"""
+WebDriver command tracing for --profile runs.
+- Wraps Selenium's remote connection so every chromedriver command is
+  recorded with its name, latency and request/response size.
+- Run phases (metrics spans) are recorded alongside the commands.
+- Writes a Chrome trace-event JSON file per run (open it in Perfetto or
+  chrome://tracing) and prints the commands that took the most time.
+- Optionally runs cProfile over the Python side as well.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+
+import metrics
+from metrics import current_run
+
+TRACE_DIR = os.getenv('TRACE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'traces'))
+SUMMARY_ROWS = 15
+
+
+def _size(value):
+    try:
+        return len(json.dumps(value, default=str))
+    except (TypeError, ValueError):
+        return 0
+
+
+def command_name(command, params):
+    """The WebDriver command, with the CDP method for executeCdpCommand"""
+    if command == 'executeCdpCommand' and isinstance(params, dict):
+        return f"cdp:{params.get('cmd')}"
+    return command
+
+
+class CommandTracer:
+    """Records WebDriver commands and run phases as trace events"""
+
+    def __init__(self, trace_dir=TRACE_DIR, python=False):
+        self.trace_dir = trace_dir
+        self.python = python
+        self.events = []
+        self.commands = {}  # name -> [count, total seconds, max seconds, bytes]
+        self.profiler = None
+        self._lock = threading.Lock()
+        self._origin = None
+        self._original_execute = None
+        self._connection = None
+
+    def _us(self, moment):
+        return round((moment - self._origin) * 1e6)
+
+    def _add(self, name, category, start, end, args=None):
+        event = {
+            'name': name, 'cat': category, 'ph': 'X', 'pid': os.getpid(), 'tid': threading.get_ident(),
+            'ts': self._us(start), 'dur': self._us(end) - self._us(start), 'args': args or {},
+        }
+        with self._lock:
+            self.events.append(event)
+
+    def _on_span(self, name, start, end):
+        self._add(name, 'phase', start, end)
+
+    def _record_command(self, name, start, end, sent, received):
+        seconds = end - start
+        with self._lock:
+            stats = self.commands.setdefault(name, [0, 0.0, 0.0, 0])
+            stats[0] += 1
+            stats[1] += seconds
+            stats[2] = max(stats[2], seconds)
+            stats[3] += sent + received
+        self._add(name, 'webdriver', start, end, {'request_bytes': sent, 'response_bytes': received})
+        current_run().incr("webdriver_commands")
+
+    def _patch_selenium(self):
+        try:
+            from selenium.webdriver.remote.remote_connection import RemoteConnection
+        except ImportError:
+            logging.info("Selenium not installed; tracing run phases only")
+            return
+        tracer = self
+        original = RemoteConnection.execute
+
+        def execute(connection, command, params):
+            start = time.monotonic()
+            response = None
+            try:
+                response = original(connection, command, params)
+                return response
+            finally:
+                tracer._record_command(command_name(command, params), start, time.monotonic(),
+                                       _size(params), _size(response))
+
+        self._connection = RemoteConnection
+        self._original_execute = original
+        RemoteConnection.execute = execute
+
+    def start(self):
+        self._origin = time.monotonic()
+        metrics.SPAN_LISTENERS.append(self._on_span)
+        self._patch_selenium()
+        if self.python:
+            import cProfile
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+        return self
+
+    def stop(self):
+        """Stop tracing, write the trace (and cProfile stats) and print the summary"""
+        if self.profiler:
+            self.profiler.disable()
+        if self._connection:
+            self._connection.execute = self._original_execute
+        if self._on_span in metrics.SPAN_LISTENERS:
+            metrics.SPAN_LISTENERS.remove(self._on_span)
+
+        os.makedirs(self.trace_dir, exist_ok=True)
+        stem = os.path.join(self.trace_dir, f"run-{datetime.now():%Y%m%d-%H%M%S}-{os.getpid()}")
+        with open(f"{stem}.trace.json", 'w') as f:
+            json.dump({'traceEvents': self.events, 'displayTimeUnit': 'ms'}, f)
+        print(f"\nTrace written to {stem}.trace.json (open it in https://ui.perfetto.dev or chrome://tracing)")
+        self.print_summary()
+
+        if self.profiler:
+            import pstats
+            self.profiler.dump_stats(f"{stem}.prof")
+            print(f"\nPython profile written to {stem}.prof; top functions by cumulative time:")
+            pstats.Stats(self.profiler).sort_stats('cumulative').print_stats(SUMMARY_ROWS)
+
+    def print_summary(self, rows=SUMMARY_ROWS):
+        total_count = sum(stats[0] for stats in self.commands.values())
+        total_seconds = sum(stats[1] for stats in self.commands.values())
+        print(f"\n{total_count} WebDriver command(s), {total_seconds:.2f}s in total")
+        if not self.commands:
+            return
+        print(f"{'command':<36} {'count':>6} {'total ms':>10} {'mean ms':>9} {'max ms':>9} {'KB':>8}")
+        ranked = sorted(self.commands.items(), key=lambda item: item[1][1], reverse=True)
+        for name, (count, seconds, longest, size) in ranked[:rows]:
+            print(f"{name[:36]:<36} {count:>6} {seconds * 1000:>10.1f} {seconds / count * 1000:>9.1f} "
+                  f"{longest * 1000:>9.1f} {size / 1024:>8.1f}")
@@ -0,0 +1,23 @@
+"""
+Config file loading shared by the accounts file and the offer catalog.
+- TOML through tomllib (tomli before Python 3.11).
+- YAML (.yaml/.yml) through PyYAML, if it is installed.
+"""
+
+
+def load_config(path, what):
+    """Parse a TOML or YAML config file into a dict; `what` names it in errors (e.g. "account")"""
+    if path.endswith(('.yaml', '.yml')):
+        try:
+            import yaml
+        except ImportError:
+            raise ValueError(f"YAML {what} files need PyYAML (sudo apt install python3-yaml)")
+        with open(path, 'r') as f:
+            return yaml.safe_load(f) or {}
+
+    try:
+        import tomllib
+    except ImportError:  # Python < 3.11
+        import tomli as tomllib
+    with open(path, 'rb') as f:
+        return tomllib.load(f)
@@ -0,0 +1,124 @@
+"""
+Network-level activation confirmation for the browser backend.
+- Marks the CDP request log just before the activate click.
+- Waits for the activation request the click sends (a POST to the offer's
+  activate endpoint or a known GraphQL activation mutation) and reads its
+  response.
+- Decides activated / refused from the status and body as soon as the
+  response arrives (a JSON body must report success explicitly), and pulls
+  out the issued code.
+- Returns None when the network gives no clear answer, so the caller falls
+  back to reading the page.
+"""
+
+import json
+import logging
+from urllib.parse import urlsplit
+
+from cdp_events import event_log
+from page_state import classify_text, extract_code, ACTIVATED, ACTIONABLE, UNKNOWN
+
+NETWORK_CONFIRM_TIMEOUT = 10
+# The request that activates an offer: a POST to <offer page>/<one of these>/ ...
+ACTIVATION_PATHS = ['activate', 'claim', 'redeem']
+# ... or a GraphQL mutation with one of these operation names (offers.toml can override them)
+ACTIVATION_OPERATIONS = ['activateOffer', 'claimOffer', 'claimOctoplusReward', 'redeemOctoplusReward']
+READ_ONLY_METHODS = ('GET', 'HEAD', 'OPTIONS')
+RESPONSE_TYPES = (None, 'Document', 'XHR', 'Fetch')
+# What a JSON response must say for the activation to count as confirmed
+SUCCESS_FLAGS = {'success', 'ok', 'activated', 'claimed', 'isactivated', 'isclaimed'}
+SUCCESS_STATUSES = {'success', 'succeeded', 'ok', 'activated', 'claimed', 'redeemed'}
+
+
+def mark_requests(driver):
+    """Where the request log stands now; pass it to confirm_activation after the click"""
+    log = event_log(driver)
+    log.poll()
+    return log.sequence
+
+
+def _operation_names(post_data):
+    """GraphQL operation names in a request payload (batched requests carry several)"""
+    try:
+        payload = json.loads(post_data or '')
+    except ValueError:
+        return []
+    operations = payload if isinstance(payload, list) else [payload]
+    return [op['operationName'].lower() for op in operations
+            if isinstance(op, dict) and isinstance(op.get('operationName'), str)]
+
+
+def is_activation_request(record, offer):
+    if record['method'] in READ_ONLY_METHODS or record['type'] not in RESPONSE_TYPES:
+        return False
+    path = urlsplit(record['url']).path.rstrip('/')
+    if any(path.endswith(f"/{offer['slug']}/{segment}") for segment in ACTIVATION_PATHS):
+        return True
+    wanted = {name.lower() for name in offer.get('activation_operations') or ACTIVATION_OPERATIONS}
+    return any(name in wanted for name in _operation_names(record['post_data']))
+
+
+def _reports_success(value):
+    """True if a JSON response carries an explicit success flag or status (error details ignored)"""
+    if isinstance(value, dict):
+        for key, item in value.items():
+            lowered = key.lower()
+            if 'error' in lowered:
+                continue
+            if lowered in SUCCESS_FLAGS and item is True:
+                return True
+            if lowered == 'status' and isinstance(item, str) and item.lower() in SUCCESS_STATUSES:
+                return True
+            if _reports_success(item):
+                return True
+    elif isinstance(value, list):
+        return any(_reports_success(item) for item in value)
+    return False
+
+
+def _body_text(body):
+    """Lowercased text to match phrases against; GraphQL errors count as text too"""
+    try:
+        return json.dumps(json.loads(body)).lower()
+    except ValueError:
+        return body.lower()
+
+
+def confirm_activation(driver, offer, since, timeout=NETWORK_CONFIRM_TIMEOUT):
+    """Read the activation response the click triggered; returns (state, evidence, code) or None"""
+    log = event_log(driver)
+    record = log.wait_for_request(lambda r: is_activation_request(r, offer), after_seq=since, timeout=timeout)
+    if record is None:
+        logging.info("No activation request seen on the network, reading the page instead")
+        return None
+
+    seconds = (record['ended'] or record['started']) - record['started']
+    if record['failed']:
+        logging.warning(f"⚠️  Activation request failed: {record['failed']}")
+        return None
+
+    body = log.response_body(record['id']) or ''
+    try:
+        payload = json.loads(body) if body.lstrip().startswith(('{', '[')) else None
+    except ValueError:
+        payload = None
+    errors = payload.get('errors') if isinstance(payload, dict) else None
+    ok = 200 <= (record['status'] or 0) < 300 and not errors
+    state, evidence = classify_text(_body_text(body), after_click=True, phrases=offer['phrases'])
+    code = extract_code(body) if ok else None
+    if payload is not None:
+        # An API response confirms only with an explicit success status, never with words alone
+        if ok and _reports_success(payload):
+            state, evidence = ACTIVATED, "success status in response"
+        elif state == ACTIVATED:
+            state = UNKNOWN
+    elif state == UNKNOWN and code:
+        state, evidence = ACTIVATED, "code in response"
+    logging.info(f"🌐 Activation response: HTTP {record['status']} {record['method']} {record['url']} "
+                 f"in {seconds:.2f}s -> {state}")
+
+    if state == ACTIVATED and not ok:
+        return None  # Success words in an error response are not a confirmation
+    if state in (ACTIONABLE, UNKNOWN):
+        return None
+    return state, evidence, code
@@ -0,0 +1,196 @@
+"""
+Warm-standby claim daemon.
+- Keeps one chromedriver + Chromium running between cron runs.
+- Accepts claim jobs as JSON lines over a local Unix socket.
+- Every job gets a fresh browser context on the warm browser.
+- Health-checks the browser and recycles it after N jobs or above an RSS limit.
+"""
+
+import json
+import logging
+import os
+import socket
+import socketserver
+import time
+from contextlib import contextmanager
+
+from proctree import tree_rss_mb
+
+SOCKET_PATH = os.getenv(
+    'CLAIMER_SOCKET',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'claimer.sock')
+)
+RECYCLE_AFTER_JOBS = int(os.getenv('DAEMON_RECYCLE_JOBS', '20'))
+RECYCLE_RSS_MB = float(os.getenv('DAEMON_RECYCLE_RSS_MB', '600'))
+CLIENT_TIMEOUT = 600
+
+
+class WarmBrowser:
+    """One long-lived driver that is health-checked and recycled as needed"""
+
+    def __init__(self, factory, cleanup=None, max_jobs=RECYCLE_AFTER_JOBS, max_rss_mb=RECYCLE_RSS_MB):
+        self.factory = factory
+        self.cleanup = cleanup
+        self.max_jobs = max_jobs
+        self.max_rss_mb = max_rss_mb
+        self.driver_instance = None
+        self.jobs_served = 0
+        self.generation = 0
+        self.started_at = None
+
+    def _service_pid(self):
+        try:
+            return self.driver_instance.service.process.pid
+        except AttributeError:
+            return None
+
+    def rss_mb(self):
+        pid = self._service_pid()
+        return tree_rss_mb(pid) if pid else 0.0
+
+    def healthy(self):
+        if self.driver_instance is None:
+            return False
+        try:
+            return self.driver_instance.execute_script("return 1") == 1
+        except Exception as e:
+            logging.warning(f"⚠️  Warm browser failed health check: {e}")
+            return False
+
+    def start(self):
+        logging.info("Starting warm browser...")
+        self.driver_instance = self.factory(self.generation)
+        self.generation += 1
+        self.jobs_served = 0
+        self.started_at = time.time()
+
+    def stop(self):
+        if self.driver_instance is not None:
+            try:
+                self.driver_instance.quit()
+            except Exception as e:
+                logging.warning(f"⚠️  Error closing warm browser: {e}")
+            from resource_policy import release_cache_slot
+            release_cache_slot(self.driver_instance)
+            self.driver_instance = None
+        if self.cleanup:
+            self.cleanup()
+
+    def recycle_if_needed(self):
+        """Restart the browser if it is unhealthy, too old or too big"""
+        reason = None
+        if self.driver_instance is None:
+            reason = "not running"
+        elif self.jobs_served >= self.max_jobs:
+            reason = f"served {self.jobs_served} jobs"
+        elif not self.healthy():
+            reason = "failed health check"
+        else:
+            rss = self.rss_mb()
+            if rss > self.max_rss_mb:
+                reason = f"RSS {rss:.0f} MB over {self.max_rss_mb:.0f} MB"
+
+        if reason:
+            if self.driver_instance is not None:
+                logging.info(f"♻️  Recycling warm browser ({reason})")
+                self.stop()
+            self.start()
+
+    @contextmanager
+    def driver(self):
+        """Hand out the warm driver for one job (same shape as DriverPool.driver)"""
+        self.recycle_if_needed()
+        try:
+            yield self.driver_instance
+        finally:
+            self.jobs_served += 1
+
+    def status(self):
+        return {
+            'running': self.driver_instance is not None,
+            'healthy': self.healthy(),
+            'jobs_served': self.jobs_served,
+            'generation': self.generation,
+            'rss_mb': round(self.rss_mb(), 1),
+            'uptime_seconds': round(time.time() - self.started_at) if self.started_at else 0,
+        }
+
+
+class _JobHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        line = self.rfile.readline()
+        try:
+            request = json.loads(line)
+            response = self.server.dispatch(request)
+        except ValueError:
+            response = {'ok': False, 'error': 'invalid JSON'}
+        except Exception as e:
+            logging.error(f"❌ Daemon job failed: {e}")
+            response = {'ok': False, 'error': str(e)}
+        self.wfile.write((json.dumps(response) + "\n").encode())
+
+
+class ClaimDaemon(socketserver.UnixStreamServer):
+    """Serve claim jobs one at a time on a Unix socket using a warm browser"""
+
+    def __init__(self, warm_browser, accounts, claim_fn, socket_path=SOCKET_PATH):
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        super().__init__(socket_path, _JobHandler)
+        os.chmod(socket_path, 0o600)
+        self.socket_path = socket_path
+        self.warm_browser = warm_browser
+        self.accounts = {account['name']: account for account in accounts}
+        self.claim_fn = claim_fn
+
+    def dispatch(self, request):
+        command = request.get('command')
+        if command == 'health':
+            return {'ok': True, 'browser': self.warm_browser.status()}
+        if command == 'claim':
+            names = [request['account']] if request.get('account') else list(self.accounts)
+            unknown = [name for name in names if name not in self.accounts]
+            if unknown:
+                return {'ok': False, 'error': f"unknown account(s): {', '.join(unknown)}"}
+            start = time.monotonic()
+            results = {name: self.claim_fn(self.accounts[name], self.warm_browser) for name in names}
+            return {'ok': True, 'results': results, 'seconds': round(time.monotonic() - start, 2)}
+        return {'ok': False, 'error': f"unknown command: {command}"}
+
+    def serve(self):
+        logging.info(f"🟢 Claim daemon listening on {self.socket_path}")
+        try:
+            # Start the browser now so the first job does not pay the cold start
+            self.warm_browser.recycle_if_needed()
+            self.serve_forever()
+        finally:
+            self.warm_browser.stop()
+            self.server_close()
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+
+
+def send_job(request, socket_path=SOCKET_PATH, timeout=CLIENT_TIMEOUT):
+    """Send one request to the daemon; returns the response, or None if it is not running"""
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.settimeout(timeout)
+            client.connect(socket_path)
+            client.sendall((json.dumps(request) + "\n").encode())
+            data = b''
+            while not data.endswith(b"\n"):
+                chunk = client.recv(65536)
+                if not chunk:
+                    break
+                data += chunk
+    except (FileNotFoundError, ConnectionRefusedError):
+        return None
+    except OSError as e:
+        # Timed out, reset or a stale socket file: claim locally (the claim lease stops a double claim)
+        logging.warning(f"⚠️  Claim daemon did not answer ({e}), claiming in this process")
+        return None
+    try:
+        return json.loads(data) if data else None
+    except ValueError:
+        logging.warning("⚠️  Claim daemon sent an incomplete response, claiming in this process")
+        return None
@@ -0,0 +1,190 @@
+"""
+Browser engines the claimer can drive.
+- chromium: the full Chromium/Chrome browser with chromedriver.
+- headless-shell: chrome-headless-shell, Chrome's headless-only build
+  (no GPU, extensions or UI code; starts faster and uses less memory).
+- firefox: Firefox with geckodriver (no DevTools protocol, so no request
+  blocking via CDP, network confirmation or fresh browser contexts).
+- Resolved binary and driver paths are cached with their versions and only
+  re-checked when a binary changes (e.g. after a package upgrade) or a
+  different binary would now be picked.
+- Browser and driver versions are checked against each other before start.
+"""
+
+import json
+import logging
+import os
+import re
+import shutil
+import subprocess
+
+BROWSER_ENGINE = os.getenv('BROWSER_ENGINE', 'chromium').lower()  # chromium, headless-shell, firefox or auto
+ENGINE_CACHE_FILE = os.getenv('ENGINE_CACHE_FILE', os.path.expanduser('~/.cache/octopus-claimer/engines.json'))
+VERSION_TIMEOUT = 10
+
+# Lowest Firefox each geckodriver release supports (from geckodriver's support table)
+GECKODRIVER_MIN_FIREFOX = {(0, 35): 115, (0, 34): 115, (0, 33): 102, (0, 32): 102, (0, 31): 91, (0, 30): 78}
+
+
+class EngineUnavailable(Exception):
+    """The engine's browser or driver is missing, or their versions do not match"""
+
+
+def read_version(path):
+    """`path --version` as a tuple of ints, or None if it could not be read"""
+    try:
+        output = subprocess.run([path, '--version'], capture_output=True, text=True,
+                                timeout=VERSION_TIMEOUT).stdout
+    except (OSError, subprocess.SubprocessError):
+        return None
+    match = re.search(r'(\d+)\.(\d+)(?:\.(\d+))?', output)
+    return tuple(int(part) for part in match.groups() if part is not None) if match else None
+
+
+def _load_cache(path=ENGINE_CACHE_FILE):
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_cache(cache, path=ENGINE_CACHE_FILE):
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(cache, f, indent=2)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logging.debug(f"Could not save engine cache: {e}")
+
+
+def _stamp(path):
+    try:
+        st = os.stat(path)
+        return [st.st_mtime_ns, st.st_size]
+    except (OSError, TypeError):
+        return None
+
+
+def _first_existing(candidates):
+    for candidate in candidates:
+        path = candidate if os.path.isabs(candidate) else shutil.which(candidate)
+        if path and os.path.exists(path):
+            return path
+    return None
+
+
+class BrowserEngine:
+    """One browser plus its WebDriver, and how to find and check them"""
+
+    name = None
+    family = 'chromium'  # chromium or firefox: which options and driver class to use
+    cdp = True           # Whether the driver speaks the Chrome DevTools protocol
+    binary_optional = False  # True if Selenium may locate the browser itself
+    binaries = []
+    drivers = []
+
+    def check_versions(self, browser_version, driver_version):
+        """Raise EngineUnavailable if this driver cannot drive this browser"""
+        if browser_version and driver_version and browser_version[0] != driver_version[0]:
+            raise EngineUnavailable(
+                f"{self.name}: browser is version {browser_version[0]} but its driver is version "
+                f"{driver_version[0]}; install matching versions")
+
+    def resolve(self, cache_file=ENGINE_CACHE_FILE):
+        """Return (binary, driver) paths, probing and checking versions only when the cache is stale.
+
+        Either is None when it should be left to Selenium Manager.
+        """
+        candidates = self.binaries + self.drivers
+        binary = _first_existing(self.binaries)
+        driver = _first_existing(self.drivers)
+        cache = _load_cache(cache_file)
+        entry = cache.get(self.name)
+        # Finding the paths is cheap; it is the --version probes the cache saves. A different candidate
+        # list, or a higher-priority candidate installed since, changes the paths and misses the cache.
+        if entry and entry.get('candidates') == candidates \
+                and (entry['binary'], entry['driver']) == (binary, driver) \
+                and _stamp(binary) == entry['binary_stamp'] and _stamp(driver) == entry['driver_stamp']:
+            return binary, driver
+
+        if not binary and not self.binary_optional:
+            raise EngineUnavailable(f"{self.name}: no browser binary found (looked for {', '.join(self.binaries)})")
+        browser_version = read_version(binary) if binary else None
+        driver_version = read_version(driver) if driver else None
+        self.check_versions(browser_version, driver_version)
+
+        entry = {
+            'candidates': candidates,
+            'binary': binary, 'binary_stamp': _stamp(binary),
+            'browser_version': '.'.join(map(str, browser_version or ())),
+            'driver': driver, 'driver_stamp': _stamp(driver),
+            'driver_version': '.'.join(map(str, driver_version or ())),
+        }
+        if binary:
+            # Without a binary there is nothing to invalidate the entry once one is installed
+            cache[self.name] = entry
+            _save_cache(cache, cache_file)
+        logging.info(f"🔎 {self.name}: {binary or 'browser from Selenium Manager'} "
+                     f"({entry['browser_version'] or 'version unknown'}), "
+                     f"driver {driver or 'from Selenium Manager'} ({entry['driver_version'] or 'version unknown'})")
+        return binary, driver
+
+
+class ChromiumEngine(BrowserEngine):
+    name = 'chromium'
+    binary_optional = True
+    binaries = ["/usr/bin/chromium-browser", "/usr/bin/google-chrome", "/usr/bin/chromium",
+                "/snap/bin/chromium", "/usr/bin/google-chrome-stable"]
+    drivers = ["/usr/bin/chromedriver", "/usr/local/bin/chromedriver", "/snap/bin/chromium.chromedriver"]
+    headless_flag = "--headless=new"
+
+
+class HeadlessShellEngine(ChromiumEngine):
+    name = 'headless-shell'
+    binaries = ["chrome-headless-shell", "/usr/local/bin/chrome-headless-shell",
+                "/opt/chrome-headless-shell/chrome-headless-shell",
+                os.path.expanduser("~/.cache/selenium/chrome-headless-shell/chrome-headless-shell")]
+    drivers = ChromiumEngine.drivers + ["chromedriver"]
+    binary_optional = False
+    headless_flag = None  # Always headless
+
+
+class FirefoxEngine(BrowserEngine):
+    name = 'firefox'
+    family = 'firefox'
+    cdp = False
+    binaries = ["/usr/bin/firefox-esr", "/usr/bin/firefox", "/snap/bin/firefox", "firefox"]
+    drivers = ["/usr/bin/geckodriver", "/usr/local/bin/geckodriver", "/snap/bin/geckodriver", "geckodriver"]
+
+    def check_versions(self, browser_version, driver_version):
+        if not browser_version or not driver_version:
+            return
+        minimum = GECKODRIVER_MIN_FIREFOX.get(driver_version[:2])
+        if minimum and browser_version[0] < minimum:
+            raise EngineUnavailable(
+                f"firefox: geckodriver {'.'.join(map(str, driver_version))} needs Firefox {minimum} or newer, "
+                f"found {browser_version[0]}")
+
+
+ENGINES = {engine.name: engine for engine in (ChromiumEngine(), HeadlessShellEngine(), FirefoxEngine())}
+# Lightest first, for BROWSER_ENGINE=auto
+AUTO_ORDER = ['headless-shell', 'chromium', 'firefox']
+
+
+def select_engine(name=None):
+    """The configured engine (the lightest installed one for 'auto'); returns (engine, binary, driver)"""
+    name = (name or BROWSER_ENGINE).lower()
+    if name == 'auto':
+        for candidate in AUTO_ORDER:
+            try:
+                return (ENGINES[candidate],) + ENGINES[candidate].resolve()
+            except EngineUnavailable:
+                continue
+        raise EngineUnavailable("No supported browser found (chromium, chrome-headless-shell or firefox)")
+    if name not in ENGINES:
+        raise ValueError(f"Unknown BROWSER_ENGINE '{name}' (use {', '.join(ENGINES)} or auto)")
+    return (ENGINES[name],) + ENGINES[name].resolve()
+
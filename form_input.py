@@ -0,0 +1,104 @@
+"""
+Pluggable form input strategies.
+- per_char: one send_keys per character with human-like pauses (slowest).
+- send_keys: the whole value in a single send_keys command.
+- insert_text: CDP Input.insertText, which React sees as a real input event.
+- set_value: sets the value through the native setter and fires input/change
+  events in one script call (fewest round trips).
+- Every fill logs its WebDriver round trips and time, and reads the value
+  back in a separate call; a mode the field ignores falls through to the
+  next one.
+"""
+
+import logging
+import os
+import random
+import time
+
+from metrics import current_run
+
+INPUT_MODE = os.getenv('INPUT_MODE', 'send_keys')
+
+# Cheapest first; a failed login retries with the next, more conservative mode
+MODES = ['set_value', 'insert_text', 'send_keys', 'per_char']
+
+# React tracks the last value it saw on the element, so the value must be set
+# through the prototype's setter for its onChange to fire.
+SET_VALUE_SCRIPT = """
+var el = arguments[0], value = arguments[1];
+var proto = el instanceof HTMLTextAreaElement ? HTMLTextAreaElement.prototype : HTMLInputElement.prototype;
+Object.getOwnPropertyDescriptor(proto, 'value').set.call(el, value);
+el.dispatchEvent(new Event('input', {bubbles: true}));
+el.dispatchEvent(new Event('change', {bubbles: true}));
+"""
+
+# Focus and select the current contents so insertText replaces them
+SELECT_SCRIPT = "arguments[0].focus(); arguments[0].select();"
+
+
+def _per_char(driver, element, text, delay_range=(0.05, 0.15)):
+    element.clear()
+    time.sleep(random.uniform(0.1, 0.3))
+    for char in text:
+        element.send_keys(char)
+        time.sleep(random.uniform(*delay_range))
+    return 1 + len(text)
+
+
+def _send_keys(driver, element, text):
+    element.clear()
+    element.send_keys(text)
+    return 2
+
+
+def _insert_text(driver, element, text):
+    driver.execute_script(SELECT_SCRIPT, element)
+    driver.execute_cdp_cmd('Input.insertText', {'text': text})
+    return 2
+
+
+def _set_value(driver, element, text):
+    driver.execute_script(SET_VALUE_SCRIPT, element, text)
+    return 1
+
+
+STRATEGIES = {
+    'per_char': _per_char,
+    'send_keys': _send_keys,
+    'insert_text': _insert_text,
+    'set_value': _set_value,
+}
+
+
+def mode_for_attempt(attempt, mode=INPUT_MODE):
+    """The configured mode first, then more conservative ones on later attempts"""
+    if mode not in STRATEGIES:
+        logging.warning(f"⚠️  Unknown INPUT_MODE '{mode}', using send_keys")
+        mode = 'send_keys'
+    index = min(MODES.index(mode) + attempt, len(MODES) - 1)
+    return MODES[index]
+
+
+def fill_field(driver, element, text, field_name, mode=INPUT_MODE):
+    """Fill a form field, moving to more conservative modes until the value sticks.
+
+    Returns the mode that worked, or None if none did.
+    """
+    run = current_run()
+    for mode in MODES[MODES.index(mode):]:
+        if mode == 'insert_text' and not hasattr(driver, 'execute_cdp_cmd'):
+            continue  # Needs CDP, which Firefox does not have
+        start = time.monotonic()
+        round_trips = STRATEGIES[mode](driver, element, text)
+        # Read back in a separate call, after the page has handled the events: a controlled
+        # React field that rejected the input has reset its value by then
+        value = element.get_property('value')
+        round_trips += 1
+        run.incr("input_round_trips", round_trips)
+        logging.info(f"⌨️  Filled {field_name} with {mode}: {round_trips} round trip(s) "
+                     f"in {time.monotonic() - start:.2f}s")
+        if value == text:
+            run.set("input_mode", mode)
+            return mode
+        logging.warning(f"⚠️  {field_name} did not accept input mode {mode}")
+    return None
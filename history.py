@@ -0,0 +1,228 @@
+"""
+Transactional claim history (SQLite, WAL mode).
+- Records every attempt with account, offer, outcome, observed page state,
+  phase timings and the issued code in one atomic write.
+- Indexed "claimed since" lookups replace re-parsing last_claim.txt.
+- A short-lived claim lease stops concurrent processes claiming twice.
+- Existing last_claim.txt and claim_history.jsonl files are imported once.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+HISTORY_DB = os.getenv('CLAIM_HISTORY_DB', os.path.join(SCRIPT_DIR, 'claims.db'))
+LEGACY_HISTORY_FILE = os.path.join(SCRIPT_DIR, 'claim_history.jsonl')
+DEFAULT_OFFER = 'caffe-nero'
+LEASE_SECONDS = 15 * 60
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS attempts (
+    id INTEGER PRIMARY KEY,
+    at TEXT NOT NULL,
+    account TEXT NOT NULL,
+    offer TEXT NOT NULL,
+    outcome TEXT NOT NULL,
+    page_state TEXT,
+    timings TEXT,
+    code TEXT
+);
+CREATE INDEX IF NOT EXISTS attempts_by_outcome ON attempts (account, offer, outcome, at);
+CREATE INDEX IF NOT EXISTS attempts_by_time ON attempts (account, at);
+CREATE TABLE IF NOT EXISTS claim_leases (
+    account TEXT NOT NULL,
+    offer TEXT NOT NULL,
+    holder TEXT NOT NULL,
+    expires_at REAL NOT NULL,
+    PRIMARY KEY (account, offer)
+);
+CREATE TABLE IF NOT EXISTS migrations (
+    name TEXT PRIMARY KEY,
+    applied_at TEXT NOT NULL
+);
+"""
+
+
+class HistoryStore:
+    """Claim history in an embedded SQLite database"""
+
+    def __init__(self, path=HISTORY_DB):
+        self.path = path
+        self._local = threading.local()
+
+    @property
+    def db(self):
+        # sqlite3 connections must stay on the thread that made them
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self._upgrade(conn)
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _upgrade(conn):
+        """Add columns that databases created by older versions lack"""
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(attempts)")}
+        if 'code' not in columns:
+            try:
+                conn.execute("ALTER TABLE attempts ADD COLUMN code TEXT")
+            except sqlite3.OperationalError:
+                pass  # Another process added it first
+
+    @contextmanager
+    def transaction(self):
+        """BEGIN IMMEDIATE ... COMMIT, rolled back on any error"""
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            yield self.db
+        except BaseException:
+            self.db.execute("ROLLBACK")
+            raise
+        self.db.execute("COMMIT")
+
+    def record_attempt(self, account, outcome, offer=DEFAULT_OFFER, page_state=None, timings=None, when=None,
+                       code=None):
+        with self.transaction() as db:
+            db.execute(
+                "INSERT INTO attempts (at, account, offer, outcome, page_state, timings, code) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                ((when or datetime.now()).isoformat(timespec='seconds'), account, offer, outcome,
+                 page_state, json.dumps(timings) if timings else None, code)
+            )
+
+    def load_attempts(self, account=None, offer=None, since=None):
+        """Return attempts as (datetime, outcome) tuples, oldest first"""
+        query = "SELECT at, outcome FROM attempts WHERE 1=1"
+        params = []
+        if account:
+            query += " AND account = ?"
+            params.append(account)
+        if offer:
+            query += " AND offer = ?"
+            params.append(offer)
+        if since:
+            query += " AND at >= ?"
+            params.append(since.isoformat(timespec='seconds'))
+        rows = self.db.execute(query + " ORDER BY at", params).fetchall()
+        return [(datetime.fromisoformat(at), outcome) for at, outcome in rows]
+
+    def last_claim(self, account, offer=DEFAULT_OFFER):
+        row = self.db.execute(
+            "SELECT MAX(at) FROM attempts WHERE account = ? AND offer = ? AND outcome = 'claimed'",
+            (account, offer)
+        ).fetchone()
+        return datetime.fromisoformat(row[0]) if row and row[0] else None
+
+    def last_code(self, account, offer=DEFAULT_OFFER):
+        """The code issued by the most recent claim that captured one, or None"""
+        row = self.db.execute(
+            "SELECT code FROM attempts WHERE account = ? AND offer = ? AND outcome = 'claimed' AND code IS NOT NULL "
+            "ORDER BY at DESC LIMIT 1",
+            (account, offer)
+        ).fetchone()
+        return row[0] if row else None
+
+    def claimed_since(self, account, since, offer=DEFAULT_OFFER):
+        """Indexed lookup: has this account claimed the offer at or after `since`?"""
+        row = self.db.execute(
+            "SELECT 1 FROM attempts WHERE account = ? AND offer = ? AND outcome = 'claimed' AND at >= ? LIMIT 1",
+            (account, offer, since.isoformat(timespec='seconds'))
+        ).fetchone()
+        return row is not None
+
+    @contextmanager
+    def claim_lease(self, account, offer=DEFAULT_OFFER, seconds=LEASE_SECONDS):
+        """Yield True if this process may claim now, False if another one holds the lease"""
+        holder = f"{os.getpid()}-{os.urandom(4).hex()}"
+        now = time.time()
+        with self.transaction() as db:
+            row = db.execute("SELECT holder, expires_at FROM claim_leases WHERE account = ? AND offer = ?",
+                             (account, offer)).fetchone()
+            acquired = row is None or row[1] < now
+            if acquired:
+                db.execute("INSERT OR REPLACE INTO claim_leases (account, offer, holder, expires_at) VALUES (?, ?, ?, ?)",
+                           (account, offer, holder, now + seconds))
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                with self.transaction() as db:
+                    db.execute("DELETE FROM claim_leases WHERE account = ? AND offer = ? AND holder = ?",
+                               (account, offer, holder))
+
+    def _migrate_once(self, name, rows):
+        """Insert legacy rows in one transaction unless this migration already ran"""
+        if self.db.execute("SELECT 1 FROM migrations WHERE name = ?", (name,)).fetchone():
+            return False
+        with self.transaction() as db:
+            if db.execute("SELECT 1 FROM migrations WHERE name = ?", (name,)).fetchone():
+                return False
+            db.executemany(
+                "INSERT INTO attempts (at, account, offer, outcome) VALUES (?, ?, ?, ?)", rows
+            )
+            db.execute("INSERT INTO migrations (name, applied_at) VALUES (?, ?)",
+                       (name, datetime.now().isoformat(timespec='seconds')))
+        return True
+
+    def migrate_state_file(self, state_file, account, offer=DEFAULT_OFFER):
+        """Import a legacy last_claim.txt as a claimed attempt (once per file)"""
+        name = f"state_file:{os.path.abspath(state_file)}"
+        if not os.path.exists(state_file) or \
+                self.db.execute("SELECT 1 FROM migrations WHERE name = ?", (name,)).fetchone():
+            return
+        try:
+            with open(state_file, 'r') as f:
+                last_claim = datetime.fromisoformat(f.read().strip())
+        except (ValueError, OSError) as e:
+            logging.warning(f"⚠️  Could not read legacy state file {state_file}: {e}")
+            return
+        row = (last_claim.isoformat(timespec='seconds'), account, offer, 'claimed')
+        if self._migrate_once(name, [row]):
+            logging.info(f"📦 Imported last claim ({last_claim.date()}) from {state_file}")
+
+    def migrate_history_file(self, history_file=LEGACY_HISTORY_FILE, offer=DEFAULT_OFFER):
+        """Import attempts from the older claim_history.jsonl (once)"""
+        if not os.path.exists(history_file):
+            return
+        rows = []
+        with open(history_file, 'r') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                    rows.append((entry['at'], entry['account'], offer, entry['outcome']))
+                except (ValueError, KeyError):
+                    continue
+        if self._migrate_once(f"history_file:{os.path.abspath(history_file)}", rows):
+            logging.info(f"📦 Imported {len(rows)} attempts from {history_file}")
+
+
+_default_store = None
+
+
+def default_store():
+    global _default_store
+    if _default_store is None:
+        _default_store = HistoryStore()
+        _default_store.migrate_history_file()
+    return _default_store
+
+
+def record_attempt(account, outcome, **kwargs):
+    try:
+        default_store().record_attempt(account, outcome, **kwargs)
+    except sqlite3.Error as e:
+        logging.error(f"❌ Failed to record attempt: {e}")
+
+
+def load_attempts(account=None, offer=None, since=None):
+    return default_store().load_attempts(account, offer, since)
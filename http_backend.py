@@ -0,0 +1,262 @@
+"""
+Headless HTTP claim backend.
+- Logs in once and activates every due offer with a pooled, keep-alive HTTP session.
+- No browser is started, so a run needs a few MB and a few seconds.
+- Leaves out any offer it cannot finish over plain HTTP so the caller can
+  fall back to the Selenium backend for it.
+"""
+
+import logging
+import time
+from html.parser import HTMLParser
+from urllib.parse import urljoin
+
+try:
+    import requests
+    from requests.adapters import HTTPAdapter
+except ImportError:  # Optional: the Selenium backend works without it
+    requests = None
+
+from metrics import current_run, run_outcome
+from page_state import classify_text, find_phrase, extract_code, UNAVAILABLE, ALREADY_ACTIVATED, ACTIVATED
+
+DEFAULT_USER_AGENT = "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+REQUEST_TIMEOUT = 20
+
+
+class _PageParser(HTMLParser):
+    """Collect visible text and forms from a page in a single pass"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.text_parts = []
+        self.forms = []
+        self._form = None
+        self._button = None
+        self._skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag in ('script', 'style', 'noscript'):
+            self._skip_depth += 1
+        elif tag == 'form':
+            self._form = {
+                'action': attrs.get('action') or '',
+                'method': (attrs.get('method') or 'get').lower(),
+                'fields': {},
+                'buttons': [],
+            }
+            self.forms.append(self._form)
+        elif tag == 'input' and self._form is not None:
+            name = attrs.get('name')
+            input_type = (attrs.get('type') or 'text').lower()
+            if input_type == 'submit':
+                self._form['buttons'].append({'name': name, 'value': attrs.get('value') or '', 'text': attrs.get('value') or ''})
+            elif name:
+                self._form['fields'][name] = attrs.get('value') or ''
+        elif tag == 'button' and self._form is not None:
+            self._button = {'name': attrs.get('name'), 'value': attrs.get('value') or '', 'text': ''}
+            self._form['buttons'].append(self._button)
+
+    def handle_endtag(self, tag):
+        if tag in ('script', 'style', 'noscript') and self._skip_depth:
+            self._skip_depth -= 1
+        elif tag == 'form':
+            self._form = None
+        elif tag == 'button':
+            self._button = None
+
+    def handle_data(self, data):
+        if self._skip_depth:
+            return
+        self.text_parts.append(data)
+        if self._button is not None:
+            self._button['text'] += data
+
+    @property
+    def text(self):
+        return " ".join(" ".join(self.text_parts).split()).lower()
+
+
+def parse_page(html):
+    parser = _PageParser()
+    parser.feed(html)
+    parser.close()
+    return parser
+
+
+class HttpBackend:
+    """Claim offers with plain HTTP requests instead of a browser"""
+
+    name = "http"
+
+    def __init__(self, base_url, email, password, account_id, session_store=None,
+                 user_agent=DEFAULT_USER_AGENT, login_url=None, dashboard_url=None,
+                 offer_url_template=None):
+        self.base_url = base_url.rstrip('/')
+        self.email = email
+        self.password = password
+        self.account_id = account_id
+        self.session_store = session_store
+        self.user_agent = user_agent
+        self.login_url = login_url or f"{self.base_url}/login/"
+        self.dashboard_url = dashboard_url or f"{self.base_url}/dashboard/"
+        self.offer_url_template = offer_url_template or (
+            f"{self.base_url}/dashboard/new/accounts/{{account_id}}/octoplus/partner/offers/{{slug}}"
+        )
+        self.session = None
+        self._session_source = None  # 'reused' or 'login', counted only if this backend finishes the claim
+
+    def offer_url(self, offer):
+        return self.offer_url_template.format(account_id=self.account_id, slug=offer['slug'])
+
+    def _open_session(self):
+        session = requests.Session()
+        # One small keep-alive pool is plenty for a handful of same-host requests
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=2)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        session.headers.update({
+            'User-Agent': self.user_agent,
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+            'Accept-Language': 'en-GB,en;q=0.9',
+        })
+        return session
+
+    def _restore_saved_session(self):
+        if not self.session_store:
+            return False
+        saved = self.session_store.session()
+        if not saved or not self.session_store.is_valid(self.dashboard_url):
+            return False
+        for cookie in saved['cookies']:
+            self.session.cookies.set(cookie['name'], cookie['value'],
+                                     domain=cookie.get('domain'), path=cookie.get('path', '/'))
+        logging.info("♻️  HTTP backend reusing saved session")
+        self._session_source = 'reused'
+        return True
+
+    def _save_session(self):
+        if not self.session_store:
+            return
+        cookies = [
+            {'name': c.name, 'value': c.value, 'domain': c.domain, 'path': c.path,
+             'secure': bool(c.secure), 'httpOnly': False}
+            for c in self.session.cookies
+        ]
+        self.session_store.save_cookies(cookies, self.user_agent)
+        self._session_source = 'login'
+
+    def login(self):
+        """Submit the login form; True on success, None if the form could not be handled"""
+        response = self.session.get(self.login_url, timeout=REQUEST_TIMEOUT)
+        response.raise_for_status()
+        page = parse_page(response.text)
+
+        login_form = next((f for f in page.forms if 'auth-username' in f['fields']), None)
+        if not login_form:
+            logging.info("HTTP backend: no server-rendered login form found")
+            return None
+
+        payload = dict(login_form['fields'])
+        payload['auth-username'] = self.email
+        payload['auth-password'] = self.password
+        action = urljoin(response.url, login_form['action'] or response.url)
+
+        response = self.session.post(action, data=payload, timeout=REQUEST_TIMEOUT,
+                                     headers={'Referer': response.url})
+        if response.ok and 'dashboard' in response.url:
+            logging.info("✅ HTTP login successful")
+            self._save_session()
+            return True
+
+        logging.warning(f"⚠️  HTTP login did not reach the dashboard (HTTP {response.status_code}, {response.url})")
+        return None
+
+    def activate(self, offer):
+        """Activate one offer; True/False when the outcome is known, None to fall back"""
+        response = self.session.get(self.offer_url(offer), timeout=REQUEST_TIMEOUT)
+        if not response.ok or 'login' in response.url:
+            logging.warning(f"⚠️  HTTP backend could not open the {offer['name']} offer page ({response.status_code})")
+            return None
+
+        page = parse_page(response.text)
+        state, evidence = classify_text(page.text, phrases=offer['phrases'])
+        if state in (UNAVAILABLE, ALREADY_ACTIVATED):
+            current_run().set("offer_state", state)
+            current_run().set("offer_evidence", evidence)
+            logging.info(f"ℹ️  {offer['name']} offer not claimable now: {state} ('{evidence}')")
+            return False
+
+        action_words = offer['phrases']['action']
+        activate_form = None
+        for form in page.forms:
+            if any(find_phrase(button['text'].lower(), action_words) for button in form['buttons']):
+                activate_form = form
+                break
+
+        if not activate_form:
+            # The offer page is rendered client-side; only a browser can click it
+            logging.info("HTTP backend: no activation form in the offer page")
+            return None
+
+        payload = dict(activate_form['fields'])
+        button = next(b for b in activate_form['buttons'] if find_phrase(b['text'].lower(), action_words))
+        if button['name']:
+            payload[button['name']] = button['value']
+        action = urljoin(response.url, activate_form['action'] or response.url)
+
+        logging.info(f"🎯 Submitting {offer['name']} activate offer form over HTTP")
+        response = self.session.post(action, data=payload, timeout=REQUEST_TIMEOUT,
+                                     headers={'Referer': response.url})
+        if not response.ok:
+            logging.warning(f"⚠️  Activation request failed (HTTP {response.status_code})")
+            return None
+
+        state, evidence = classify_text(parse_page(response.text).text, after_click=True, phrases=offer['phrases'])
+        if state == ACTIVATED:
+            current_run().set("offer_state", state)
+            current_run().set("offer_evidence", evidence)
+            code = extract_code(response.text)
+            if code:
+                current_run().codes[offer['slug']] = code
+            logging.info(f"✅ Successfully activated today's {offer['name']} offer!" + (f" Code: {code}" if code else ""))
+            return True
+
+        logging.info("HTTP backend: activation not confirmed by the response")
+        return None
+
+    def claim(self, offers):
+        """Log in once and activate each offer; returns {slug: outcome} for the offers it could finish.
+
+        Offers missing from the result need the browser.
+        """
+        if requests is None:
+            logging.info("HTTP backend unavailable (python3-requests not installed)")
+            return {}
+
+        start = time.monotonic()
+        self.session = self._open_session()
+        outcomes = {}
+        try:
+            if not self._restore_saved_session():
+                if not self.login():
+                    return outcomes
+            for offer in offers:
+                current_run().set("offer_state", None)
+                result = self.activate(offer)
+                if result is not None:
+                    outcomes[offer['slug']] = run_outcome(result)
+            if self.session_store and len(outcomes) == len(offers):
+                # The browser backend counts the session itself when it has to take over
+                if self._session_source == 'reused':
+                    self.session_store.record_reuse()
+                elif self._session_source == 'login':
+                    self.session_store.record_login()
+            return outcomes
+        except requests.RequestException as e:
+            logging.warning(f"⚠️  HTTP backend error: {e}")
+            return outcomes
+        finally:
+            self.session.close()
+            logging.info(f"HTTP backend finished in {time.monotonic() - start:.1f}s")
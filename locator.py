@@ -0,0 +1,146 @@
+"""
+Single-pass element locator.
+- Evaluates every XPath/CSS/text strategy in one injected script per poll.
+- Scores the visible, enabled matches and returns the best one.
+- Bounded by one overall timeout and remembers which strategy won last time;
+  if that strategy still finds exactly one clickable element, it wins
+  without running the others.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+
+LOCATOR_CACHE_FILE = os.getenv(
+    'LOCATOR_CACHE_FILE',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'locator_cache.json')
+)
+LOCATOR_TIMEOUT = float(os.getenv('LOCATOR_TIMEOUT', '15'))
+POLL_INTERVAL = 0.25
+
+# If the remembered winner matches exactly one clickable element it is
+# returned straight away (one query instead of all of them). Otherwise every
+# strategy is run against the live DOM and the matches are scored.
+LOCATE_SCRIPT = """
+var strategies = arguments[0];
+var preferred = arguments[1];
+
+function clickable(el) {
+    if (!el || el.disabled || el.getAttribute('aria-disabled') === 'true') return false;
+    var rects = el.getClientRects();
+    if (!rects.length) return false;
+    var style = window.getComputedStyle(el);
+    return style.visibility !== 'hidden' && style.display !== 'none' && style.pointerEvents !== 'none';
+}
+
+function matches(strategy) {
+    var found = [];
+    try {
+        if (strategy.type === 'xpath') {
+            var result = document.evaluate(strategy.expr, document, null,
+                XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+            for (var i = 0; i < result.snapshotLength; i++) found.push(result.snapshotItem(i));
+        } else if (strategy.type === 'css') {
+            found = Array.prototype.slice.call(document.querySelectorAll(strategy.expr));
+        } else if (strategy.type === 'text') {
+            var words = strategy.expr.split('|');
+            var candidates = document.querySelectorAll('button, a');
+            for (var j = 0; j < candidates.length; j++) {
+                var text = (candidates[j].innerText || '').toLowerCase();
+                if (words.some(function (w) { return text.indexOf(w) !== -1; })) found.push(candidates[j]);
+            }
+        }
+    } catch (e) {}
+    return found.filter(clickable);
+}
+
+for (var p = 0; p < strategies.length; p++) {
+    if (strategies[p].expr !== preferred) continue;
+    var cached = matches(strategies[p]);
+    if (cached.length === 1) {
+        return {element: cached[0], selector: preferred, score: strategies[p].weight, count: 1, cached: true};
+    }
+}
+
+var best = null;
+for (var k = 0; k < strategies.length; k++) {
+    var strategy = strategies[k];
+    var found = matches(strategy);
+    if (!found.length) continue;
+    // Prefer earlier (more specific) strategies and unambiguous matches
+    var score = strategy.weight - Math.min(found.length - 1, 5);
+    if (!best || score > best.score) {
+        best = {element: found[0], selector: strategy.expr, score: score, count: found.length};
+    }
+}
+return best;
+"""
+
+
+def build_strategies(selectors, text_words=()):
+    """Turn an ordered selector list into weighted strategies (earlier = stronger)"""
+    strategies = []
+    total = len(selectors)
+    for index, selector in enumerate(selectors):
+        strategies.append({
+            'type': 'xpath' if selector.startswith('//') else 'css',
+            'expr': selector,
+            'weight': (total - index) * 10,
+        })
+    if text_words:
+        strategies.append({'type': 'text', 'expr': '|'.join(text_words), 'weight': 0})
+    return strategies
+
+
+def _load_cache(cache_file):
+    try:
+        with open(cache_file, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _remember(cache_file, key, selector):
+    cache = _load_cache(cache_file)
+    if cache.get(key) == selector:
+        return
+    cache[key] = selector
+    # Write to a temp file first so a crash or a concurrent run never leaves a half-written cache
+    tmp_path = f"{cache_file}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, 'w') as f:
+            json.dump(cache, f, indent=2)
+        os.replace(tmp_path, cache_file)
+    except OSError as e:
+        logging.warning(f"⚠️  Could not save locator cache: {e}")
+
+
+def find_best_element(driver, key, selectors, text_words=(), timeout=LOCATOR_TIMEOUT,
+                      cache_file=LOCATOR_CACHE_FILE):
+    """Return (element, selector) for the best clickable match, or (None, None) on timeout"""
+    strategies = build_strategies(selectors, text_words)
+    preferred = _load_cache(cache_file).get(key)
+    deadline = time.monotonic() + timeout
+    polls = 0
+
+    while True:
+        polls += 1
+        try:
+            match = driver.execute_script(LOCATE_SCRIPT, strategies, preferred)
+        except Exception as e:
+            logging.debug(f"Locator poll failed: {e}")
+            match = None
+
+        if match:
+            selector = match['selector']
+            how = "remembered selector" if match.get('cached') else f"score {match['score']}, {match['count']} match(es)"
+            logging.info(f"Found {key} with selector: {selector} ({how}, {polls} poll(s))")
+            _remember(cache_file, key, selector)
+            return match['element'], selector
+
+        if time.monotonic() >= deadline:
+            logging.warning(f"⚠️  No match for {key} after {timeout:.0f}s ({polls} polls)")
+            return None, None
+        time.sleep(POLL_INTERVAL)
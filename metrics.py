@@ -0,0 +1,190 @@
+"""
+Per-run timing and metrics export.
+- Named spans time each phase of a claim run.
+- Each run appends one JSON record (phases, retries, selector, outcome).
+- Optionally writes a Prometheus textfile with p50/p95 durations across
+  recent runs for node_exporter's textfile collector.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from functools import wraps
+
+METRICS_FILE = os.getenv(
+    'METRICS_FILE',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'metrics.jsonl')
+)
+PROMETHEUS_TEXTFILE = os.getenv('PROMETHEUS_TEXTFILE')  # e.g. /var/lib/node_exporter/textfile_collector/octopus_coffee.prom
+PROMETHEUS_WINDOW = int(os.getenv('PROMETHEUS_WINDOW', '100'))  # Runs to compute quantiles over
+
+# Called with (name, start, end) in monotonic seconds whenever a span ends, e.g. by the --profile tracer
+SPAN_LISTENERS = []
+METRIC_PREFIX = "octopus_coffee"
+
+_local = threading.local()
+
+
+class RunMetrics:
+    """Timings, counters and fields collected during one claim run"""
+
+    def __init__(self, **fields):
+        self.run_id = os.urandom(6).hex()
+        self.started_at = datetime.now().isoformat(timespec='seconds')
+        self._start = time.monotonic()
+        self.phases = {}
+        self.counters = {}
+        self.fields = dict(fields)
+        self.codes = {}  # Offer codes issued this run, by slug; kept out of the metrics file
+        self.emitted = False
+
+    @contextmanager
+    def span(self, name):
+        """Time a block; repeated spans with the same name add up"""
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            end = time.monotonic()
+            self.phases[name] = self.phases.get(name, 0.0) + end - start
+            for listener in SPAN_LISTENERS:
+                listener(name, start, end)
+
+    def incr(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def set(self, key, value):
+        self.fields[key] = value
+
+    def record(self, outcome):
+        return {
+            'run_id': self.run_id,
+            'started_at': self.started_at,
+            'outcome': outcome,
+            'total_seconds': round(time.monotonic() - self._start, 3),
+            'phases': {name: round(seconds, 3) for name, seconds in self.phases.items()},
+            'counters': self.counters,
+            **self.fields,
+        }
+
+    def emit(self, outcome, metrics_file=METRICS_FILE, textfile=PROMETHEUS_TEXTFILE):
+        """Append this run's record and refresh the Prometheus textfile"""
+        if self.emitted:
+            return
+        self.emitted = True
+        record = self.record(outcome)
+        logging.info(f"📊 Run metrics: {json.dumps(record)}")
+        try:
+            with open(metrics_file, 'a') as f:
+                f.write(json.dumps(record) + "\n")
+        except OSError as e:
+            logging.warning(f"⚠️  Could not write metrics file: {e}")
+            return record
+
+        if textfile:
+            write_prometheus_textfile(metrics_file, textfile)
+        return record
+
+
+def start_run(**fields):
+    """Begin collecting metrics for a run on this thread"""
+    _local.run = RunMetrics(**fields)
+    return _local.run
+
+
+def current_run():
+    """The run being collected on this thread (a throwaway one if none was started)"""
+    run = getattr(_local, 'run', None)
+    if run is None:
+        run = _local.run = RunMetrics()
+    return run
+
+
+def run_outcome(result):
+    """Summarise a claim result: claimed, or the offer state that stopped it"""
+    if result:
+        return "claimed"
+    return current_run().fields.get("offer_state") or "failed"
+
+
+def timed(name):
+    """Decorator that records the wrapped call as a span of the current run"""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with current_run().span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _quantile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(q * (len(sorted_values) - 1)))))
+    return sorted_values[index]
+
+
+def load_recent_records(metrics_file=METRICS_FILE, limit=PROMETHEUS_WINDOW):
+    records = deque(maxlen=limit)
+    try:
+        with open(metrics_file, 'r') as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue
+    except OSError:
+        pass
+    return list(records)
+
+
+def write_prometheus_textfile(metrics_file, textfile, limit=PROMETHEUS_WINDOW):
+    """Summarise recent runs as Prometheus summaries (p50/p95) in a textfile"""
+    records = load_recent_records(metrics_file, limit)
+    if not records:
+        return
+
+    durations = {'total': []}
+    outcomes = {}
+    for record in records:
+        durations['total'].append(record.get('total_seconds', 0.0))
+        for phase, seconds in record.get('phases', {}).items():
+            durations.setdefault(phase, []).append(seconds)
+        outcome = record.get('outcome', 'unknown')
+        outcomes[outcome] = outcomes.get(outcome, 0) + 1
+
+    name = f"{METRIC_PREFIX}_phase_duration_seconds"
+    lines = [
+        f"# HELP {name} Duration of each claim phase over the last {len(records)} runs.",
+        f"# TYPE {name} summary",
+    ]
+    for phase, values in sorted(durations.items()):
+        values = sorted(values)
+        for q in (0.5, 0.95):
+            lines.append(f'{name}{{phase="{phase}",quantile="{q}"}} {_quantile(values, q):.3f}')
+        lines.append(f'{name}_sum{{phase="{phase}"}} {sum(values):.3f}')
+        lines.append(f'{name}_count{{phase="{phase}"}} {len(values)}')
+
+    lines.append(f"# HELP {METRIC_PREFIX}_runs Claim runs by outcome over the last {len(records)} runs.")
+    lines.append(f"# TYPE {METRIC_PREFIX}_runs gauge")
+    for outcome, count in sorted(outcomes.items()):
+        lines.append(f'{METRIC_PREFIX}_runs{{outcome="{outcome}"}} {count}')
+
+    lines.append(f"# HELP {METRIC_PREFIX}_last_run_timestamp_seconds When the last run finished.")
+    lines.append(f"# TYPE {METRIC_PREFIX}_last_run_timestamp_seconds gauge")
+    lines.append(f"{METRIC_PREFIX}_last_run_timestamp_seconds {time.time():.0f}")
+
+    # node_exporter may read at any moment, so swap the file in atomically
+    tmp_path = f"{textfile}.tmp"
+    try:
+        with open(tmp_path, 'w') as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp_path, textfile)
+    except OSError as e:
+        logging.warning(f"⚠️  Could not write Prometheus textfile: {e}")
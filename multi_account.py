@@ -0,0 +1,153 @@
+"""
+Multi-account claiming for the Octopus Energy claimer.
+- Reads several accounts from a TOML (or YAML) config file.
+- Runs claims concurrently with a bounded number of workers.
+- Shares a fixed pool of warm WebDriver instances between accounts.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from config_file import load_config
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CONCURRENCY = 2
+
+
+def _slug(value):
+    return "".join(c if c.isalnum() or c in '-_' else '_' for c in value)
+
+
+def load_accounts(path):
+    """Load the accounts config; returns (accounts, concurrency)"""
+    config = load_config(path, "account")
+    accounts = []
+    for index, entry in enumerate(config.get('accounts', [])):
+        missing = [key for key in ('email', 'password', 'account_id') if not entry.get(key)]
+        if missing:
+            raise ValueError(f"Account #{index + 1} in {path} is missing: {', '.join(missing)}")
+
+        account_id = entry['account_id']
+        slug = _slug(account_id)
+        accounts.append({
+            'name': entry.get('name') or account_id,
+            'email': entry['email'],
+            'password': entry['password'],
+            'account_id': account_id,
+            # Each account keeps its own weekly state and saved session
+            'state_file': entry.get('state_file') or os.path.join(SCRIPT_DIR, f'last_claim_{slug}.txt'),
+            'session_file': entry.get('session_file') or os.path.join(SCRIPT_DIR, f'session_{slug}.json'),
+        })
+
+    if not accounts:
+        raise ValueError(f"No accounts found in {path}")
+
+    concurrency = int(config.get('concurrency', DEFAULT_CONCURRENCY))
+    return accounts, max(1, concurrency)
+
+
+class DriverPool:
+    """A fixed-size pool of warm WebDriver instances, created on first use"""
+
+    def __init__(self, factory, size):
+        self.factory = factory
+        self.size = size
+        self._idle = deque()
+        # Signalled whenever a driver is returned or a slot frees up, so waiters re-check both
+        self._available = threading.Condition()
+        self._created = 0
+        self._next_index = 0
+        self._all = []
+
+    def _is_alive(self, driver):
+        try:
+            driver.execute_script("return 1")
+            return True
+        except Exception:
+            return False
+
+    def _discard(self, driver):
+        try:
+            driver.quit()
+        except Exception as e:
+            logging.warning(f"⚠️  Error closing pooled driver: {e}")
+        from resource_policy import release_cache_slot
+        release_cache_slot(driver)
+        with self._available:
+            self._created -= 1
+            if driver in self._all:
+                self._all.remove(driver)
+            self._available.notify()
+
+    def acquire(self):
+        with self._available:
+            while True:
+                if self._idle:
+                    return self._idle.popleft()
+                if self._created < self.size:
+                    self._created += 1
+                    index = self._next_index
+                    self._next_index += 1
+                    break
+                self._available.wait()
+
+        try:
+            driver = self.factory(index)
+        except Exception:
+            with self._available:
+                self._created -= 1
+                self._available.notify()
+            raise
+        with self._available:
+            self._all.append(driver)
+        logging.info(f"Started pooled driver #{index + 1} ({self._created}/{self.size})")
+        return driver
+
+    def release(self, driver):
+        if self._is_alive(driver):
+            with self._available:
+                self._idle.append(driver)
+                self._available.notify()
+        else:
+            logging.warning("Pooled driver is no longer responding, replacing it")
+            self._discard(driver)
+
+    @contextmanager
+    def driver(self):
+        driver = self.acquire()
+        try:
+            yield driver
+        finally:
+            self.release(driver)
+
+    def close(self):
+        for driver in list(self._all):
+            self._discard(driver)
+
+
+def run_accounts(accounts, concurrency, claim_fn):
+    """Run claim_fn(account) for every account with at most `concurrency` at once"""
+    start = time.monotonic()
+    results = {}
+
+    def run_one(account):
+        try:
+            return claim_fn(account)
+        except Exception as e:
+            logging.error(f"❌ [{account['name']}] Unexpected error: {e}")
+            return False
+
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='claim') as executor:
+        futures = {executor.submit(run_one, account): account for account in accounts}
+        for future, account in futures.items():
+            results[account['name']] = future.result()
+
+    claimed = sum(1 for result in results.values() if result)
+    logging.info(f"📊 {claimed}/{len(accounts)} accounts claimed or already claimed this week "
+                 f"in {time.monotonic() - start:.1f}s")
+    return results
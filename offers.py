@@ -0,0 +1,93 @@
+"""
+Octoplus partner offer catalog.
+- Each offer has a slug (its URL path segment), a weekly or daily cadence
+  and optional phrase and selector overrides for its page.
+- Read from offers.toml (or YAML) next to the script; without one the
+  catalog is just the Caffè Nero offer.
+- due_offers() picks the offers not yet claimed in their current week/day.
+"""
+
+import os
+from datetime import datetime, timedelta
+
+from config_file import load_config
+from page_state import (UNAVAILABLE, ALREADY_ACTIVATED, ACTIVATED, NO_CODES_PHRASES,
+                        ALREADY_ACTIVATED_PHRASES, SUCCESS_INDICATORS, ACTION_WORDS)
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+OFFERS_FILE = os.getenv('OCTOPUS_OFFERS_FILE', os.path.join(SCRIPT_DIR, 'offers.toml'))
+CADENCES = ('weekly', 'daily')
+
+DEFAULT_SELECTORS = [
+    # XPath selectors for text matching (improved to handle nested spans)
+    "//button[.//span[contains(text(), 'Activate offer')]]",
+    "//button[contains(text(), 'Activate offer')]",
+    "//button[.//span[contains(text(), 'Activate')]]",
+    "//button[contains(text(), 'Activate')]",
+    "//a[contains(text(), 'Activate offer')]",
+    "//a[contains(text(), 'Activate')]",
+    # CSS selectors for common button patterns
+    "button[class*='activate']",
+    "a[class*='activate']",
+    "button[class*='fPxMrc']",  # Using the class from the HTML image
+    # Generic button selectors as fallback
+    "button[type='submit']",
+    "button[class*='primary']",
+    "button[class*='cta']",
+    "button[tabindex='0'][type='button']"
+]
+DEFAULT_TEXT_WORDS = ["activate", "claim", "get"]
+
+DEFAULT_CATALOG = [{'slug': 'caffe-nero', 'name': 'Caffè Nero', 'cadence': 'weekly'}]
+
+
+def make_offer(entry, source="the offer catalog"):
+    """Fill in the defaults for one catalog entry"""
+    slug = entry.get('slug')
+    if not slug:
+        raise ValueError(f"An offer in {source} has no slug")
+    cadence = entry.get('cadence', 'weekly')
+    if cadence not in CADENCES:
+        raise ValueError(f"Offer {slug} in {source} has cadence '{cadence}' (use weekly or daily)")
+    return {
+        'slug': slug,
+        'name': entry.get('name') or slug,
+        'cadence': cadence,
+        'enabled': entry.get('enabled', True),
+        'phrases': {
+            UNAVAILABLE: entry.get('unavailable_phrases', NO_CODES_PHRASES),
+            ALREADY_ACTIVATED: entry.get('already_activated_phrases', ALREADY_ACTIVATED_PHRASES),
+            ACTIVATED: entry.get('success_phrases', SUCCESS_INDICATORS),
+            'action': entry.get('action_words', ACTION_WORDS),
+        },
+        'selectors': entry.get('selectors', DEFAULT_SELECTORS),
+        'text_words': entry.get('text_words', DEFAULT_TEXT_WORDS),
+        'activation_operations': entry.get('activation_operations'),  # None: confirmation.py's defaults
+    }
+
+
+def load_offers(path=OFFERS_FILE):
+    """Return the enabled offers from the catalog file (Caffè Nero alone if there is none)"""
+    if not os.path.exists(path):
+        return [make_offer(entry) for entry in DEFAULT_CATALOG]
+
+    config = load_config(path, "offer")
+    offers = [make_offer(entry, path) for entry in config.get('offers', [])]
+    offers = [offer for offer in offers if offer['enabled']]
+    if not offers:
+        raise ValueError(f"No enabled offers found in {path}")
+    return offers
+
+
+def period_start(cadence, now=None):
+    """Start of the current claim period: Monday 00:00 for weekly, midnight for daily"""
+    today = datetime.combine((now or datetime.now()).date(), datetime.min.time())
+    if cadence == 'daily':
+        return today
+    return today - timedelta(days=today.weekday())  # Monday is 0
+
+
+def due_offers(store, account_id, offers, now=None):
+    """Offers this account has not claimed yet in their current period"""
+    return [offer for offer in offers
+            if not store.claimed_since(account_id, period_start(offer['cadence'], now), offer['slug'])]
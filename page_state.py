@@ -0,0 +1,231 @@
+"""
+Offer page state detection shared by every claim backend.
+- Phrase lists that tell us the offer is unavailable or was activated.
+- Classifies the offer page into one small typed state plus the evidence
+  that decided it, either from server-rendered text or with an injected
+  MutationObserver that waits in the page and answers in one round trip.
+- Pulls the issued offer code out of a confirmation page or API response.
+"""
+
+import json
+import logging
+import re
+
+# Offer states (also stored as the attempt's page_state in the claim history)
+UNAVAILABLE = "unavailable"              # No codes left today
+ALREADY_ACTIVATED = "already_activated"  # Offer was activated before this run
+ACTIONABLE = "actionable"                # An enabled activate button is showing
+ACTIVATED = "activated"                  # This run's click was confirmed
+UNKNOWN = "unknown"                      # None of the above could be seen
+
+NO_CODES_PHRASES = [
+    "more codes tomorrow",
+    "can't be claimed at the moment",
+    "no codes available",
+    "try again tomorrow",
+]
+
+ALREADY_ACTIVATED_PHRASES = [
+    "already activated",
+    "offer activated"
+]
+
+UNAVAILABLE_PHRASES = NO_CODES_PHRASES + ALREADY_ACTIVATED_PHRASES
+
+SUCCESS_INDICATORS = [
+    "offer activated",
+    "successfully activated",
+    "code has been sent",
+    "enjoy your coffee",
+    "code:",
+    "your code",
+    "redeem"
+]
+
+ACTION_WORDS = ["activate"]
+
+# Phrase sets by the state they indicate; offers can override any of them
+DEFAULT_PHRASES = {
+    ACTIVATED: SUCCESS_INDICATORS,
+    ALREADY_ACTIVATED: ALREADY_ACTIVATED_PHRASES,
+    UNAVAILABLE: NO_CODES_PHRASES,
+    'action': ACTION_WORDS,
+}
+
+# "Your code: NERO-1234", "code is ABCD1234"; a code has at least one digit
+CODE_PATTERN = re.compile(r'(?i:\bcode\b)(?:\s+is)?\s*[:\-]?\s*(?=[A-Z-]*\d)([A-Z0-9][A-Z0-9-]{3,39})\b')
+# JSON keys the offer code is issued under (compared case-insensitively, nothing else is read)
+CODE_KEYS = {'code', 'vouchercode', 'voucher_code', 'offercode', 'offer_code', 'rewardcode', 'reward_code',
+             'redemptioncode', 'redemption_code'}
+CODE_VALUE = re.compile(r'^(?=[A-Z-]*\d)[A-Z0-9][A-Z0-9-]{3,39}$')
+
+CLASSIFY_TIMEOUT = 15  # Must stay below the driver's script timeout (30s by default)
+
+# Classifies the offer region whenever it changes and calls back as soon as
+# the state is final, so Python never has to pull the page source across.
+# Before the click only UNKNOWN is worth waiting on; after it, only a
+# confirmation or a refusal is.
+CLASSIFY_SCRIPT = """
+var phrases = arguments[0];
+var afterClick = arguments[1];
+var timeoutMs = arguments[2];
+var done = arguments[arguments.length - 1];
+var start = Date.now();
+var mutations = 0;
+var finished = false;
+var scheduled = false;
+var observer = null;
+var timer = null;
+
+function clickable(el) {
+    if (!el || el.disabled || el.getAttribute('aria-disabled') === 'true') return false;
+    if (!el.getClientRects().length) return false;
+    var style = window.getComputedStyle(el);
+    return style.visibility !== 'hidden' && style.display !== 'none' && style.pointerEvents !== 'none';
+}
+
+function firstPhrase(text, list) {
+    for (var i = 0; i < list.length; i++) {
+        if (text.indexOf(list[i]) !== -1) return list[i];
+    }
+    return null;
+}
+
+function classify() {
+    var region = document.querySelector('main') || document.body;
+    if (!region) return {state: 'unknown', evidence: null};
+    var text = (region.innerText || '').toLowerCase();
+    var hit;
+    if (afterClick && (hit = firstPhrase(text, phrases.activated))) return {state: 'activated', evidence: hit};
+    if ((hit = firstPhrase(text, phrases.already_activated))) return {state: 'already_activated', evidence: hit};
+    if ((hit = firstPhrase(text, phrases.unavailable))) return {state: 'unavailable', evidence: hit};
+    var controls = region.querySelectorAll('button, a, [role="button"]');
+    for (var i = 0; i < controls.length; i++) {
+        var label = (controls[i].innerText || '').toLowerCase().trim();
+        if (firstPhrase(label, phrases.action) && clickable(controls[i])) return {state: 'actionable', evidence: label};
+    }
+    return {state: 'unknown', evidence: null};
+}
+
+function final(result) {
+    if (afterClick) return result.state !== 'actionable' && result.state !== 'unknown';
+    return result.state !== 'unknown';
+}
+
+function finish(result) {
+    if (finished) return;
+    finished = true;
+    if (observer) observer.disconnect();
+    clearTimeout(timer);
+    result.mutations = mutations;
+    result.waited_ms = Date.now() - start;
+    done(result);
+}
+
+function check() {
+    scheduled = false;
+    var result = classify();
+    if (final(result)) finish(result);
+}
+
+var first = classify();
+if (final(first)) {
+    finish(first);
+} else {
+    observer = new MutationObserver(function (records) {
+        mutations += records.length;
+        // Batch bursts of React updates into one classification
+        if (!scheduled) {
+            scheduled = true;
+            setTimeout(check, 50);
+        }
+    });
+    observer.observe(document.documentElement, {
+        childList: true, subtree: true, characterData: true,
+        attributes: true, attributeFilter: ['disabled', 'aria-disabled', 'class', 'style', 'hidden']
+    });
+    timer = setTimeout(function () { finish(classify()); }, timeoutMs);
+}
+"""
+
+
+def find_phrase(page_text, phrases):
+    """Return the first phrase found in the (lowercased) page text, or None"""
+    for phrase in phrases:
+        if phrase in page_text:
+            return phrase
+    return None
+
+
+def classify_text(page_text, after_click=False, has_action=False, phrases=None):
+    """Classify lowercased page text the same way the in-page classifier does.
+
+    Returns (state, evidence). `has_action` says whether the caller found an
+    activate control, since plain text cannot tell.
+    """
+    phrases = phrases or DEFAULT_PHRASES
+    if after_click:
+        phrase = find_phrase(page_text, phrases[ACTIVATED])
+        if phrase:
+            return ACTIVATED, phrase
+    for state in (ALREADY_ACTIVATED, UNAVAILABLE):
+        phrase = find_phrase(page_text, phrases[state])
+        if phrase:
+            return state, phrase
+    if has_action:
+        return ACTIONABLE, None
+    return UNKNOWN, None
+
+
+def _json_code(value):
+    if isinstance(value, dict):
+        for key, item in value.items():
+            lowered = key.lower()
+            if 'error' in lowered or lowered == 'extensions':
+                continue  # GraphQL/REST error details carry codes of their own
+            if isinstance(item, str) and lowered in CODE_KEYS and CODE_VALUE.match(item.strip()):
+                return item.strip()
+            found = _json_code(item)
+            if found:
+                return found
+    elif isinstance(value, list):
+        for item in value:
+            found = _json_code(item)
+            if found:
+                return found
+    return None
+
+
+def extract_code(body):
+    """The offer code issued in a JSON response, HTML page or page text, or None"""
+    if not body:
+        return None
+    try:
+        found = _json_code(json.loads(body))
+        if found:
+            return found
+    except ValueError:
+        pass
+    text = re.sub(r'<[^>]+>', ' ', body)
+    match = CODE_PATTERN.search(text)
+    return match.group(1) if match else None
+
+
+def classify_offer(driver, after_click=False, timeout=CLASSIFY_TIMEOUT, budget=None, phrases=None):
+    """Wait in the page for a final offer state; returns (state, evidence).
+
+    Before a click the state is final as soon as it is anything but UNKNOWN.
+    After a click only ACTIVATED, ALREADY_ACTIVATED or UNAVAILABLE end the
+    wait early; otherwise the last state seen is returned at the timeout.
+    """
+    try:
+        result = driver.execute_async_script(CLASSIFY_SCRIPT, phrases or DEFAULT_PHRASES,
+                                             after_click, int(timeout * 1000))
+    except Exception as e:
+        logging.warning(f"⚠️  Offer state classifier failed: {e}")
+        return UNKNOWN, None
+
+    budget_note = f" (fixed wait was up to {budget:.1f}s)" if budget else ""
+    logging.info(f"⏱️  Offer state: {result['state']} after {result['waited_ms'] / 1000:.1f}s, "
+                 f"{result['mutations']} DOM mutation(s){budget_note}")
+    return result['state'], result['evidence']
@@ -0,0 +1,133 @@
+"""
+Phase checkpointing for the claim flow.
+- A claim is a fixed sequence of phases: driver ready, authenticated, offer
+  page loaded, activated, verified.
+- Each phase has its own retry policy with jittered exponential backoff, and
+  an optional check of the browser's current state before every retry.
+- A checkpoint remembers the last good phase, so a retry resumes from there
+  on the same driver instead of paying for browser start and login again.
+"""
+
+import logging
+import os
+import random
+import time
+
+from metrics import current_run
+from readiness import RETRY_DELAY
+from run_budget import check_cancelled
+
+DRIVER_READY = "driver_ready"
+AUTHENTICATED = "authenticated"
+OFFER_LOADED = "offer_loaded"
+OFFER_ACTIVATED = "activated"
+VERIFIED = "verified"
+PHASES = [DRIVER_READY, AUTHENTICATED, OFFER_LOADED, OFFER_ACTIVATED, VERIFIED]
+
+
+class RetryPolicy:
+    """How often a phase is attempted and how long to back off in between"""
+
+    def __init__(self, attempts, base_delay, max_delay):
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, failures):
+        """Exponential backoff with jitter in its upper half, capped at max_delay"""
+        ceiling = min(self.max_delay, self.base_delay * 2 ** (failures - 1))
+        return random.uniform(ceiling / 2, ceiling)
+
+
+POLICIES = {
+    DRIVER_READY: RetryPolicy(3, RETRY_DELAY, 10),
+    AUTHENTICATED: RetryPolicy(3, RETRY_DELAY, 10),
+    OFFER_LOADED: RetryPolicy(2, RETRY_DELAY / 2, 5),
+    OFFER_ACTIVATED: RetryPolicy(2, RETRY_DELAY / 2, 5),
+    VERIFIED: RetryPolicy(2, RETRY_DELAY / 2, 5),
+}
+
+# e.g. PHASE_ATTEMPTS="authenticated=2,offer_loaded=3"
+for _item in filter(None, os.getenv('PHASE_ATTEMPTS', '').split(',')):
+    _phase, _, _attempts = _item.partition('=')
+    if _phase.strip() in POLICIES:
+        POLICIES[_phase.strip()].attempts = max(1, int(_attempts))
+
+
+class PhaseFailed(Exception):
+    """A phase used up its retries"""
+
+    def __init__(self, phase, message):
+        super().__init__(message)
+        self.phase = phase
+
+
+class Checkpoint:
+    """The last good phase of one claim flow and what each phase produced"""
+
+    def __init__(self):
+        self.reached = -1
+        self.results = {}
+        self.clicked = set()  # Offers activated this run, even if the browser died before verifying
+
+    def passed(self, phase):
+        return self.reached >= PHASES.index(phase)
+
+    def mark(self, phase, result):
+        self.reached = PHASES.index(phase)
+        self.results[phase] = result
+
+    def rewind(self, phase):
+        """Forget `phase` and everything after it, so the flow redoes them"""
+        self.reached = min(self.reached, PHASES.index(phase) - 1)
+
+    @property
+    def last_phase(self):
+        return PHASES[self.reached] if self.reached >= 0 else None
+
+
+def run_phase(checkpoint, phase, action, check=None, abort_if=None, policy=None):
+    """Run action(attempt) until it returns something truthy, per the phase's retry policy.
+
+    Returns at once with the earlier result if the checkpoint is already past
+    this phase. Before each retry, check() may show the phase already holds;
+    abort_if() can end the retries early (e.g. the browser has died).
+    Raises PhaseFailed when the retries are used up, and RunBudgetExceeded
+    if the watchdog cancels the run.
+    """
+    if checkpoint.passed(phase):
+        return checkpoint.results.get(phase)
+
+    policy = policy or POLICIES[phase]
+    run = current_run()
+    for attempt in range(policy.attempts):
+        check_cancelled()  # Raises out of the retries once the watchdog has cancelled the run
+        if attempt:
+            if abort_if and abort_if():
+                break
+            delay = policy.delay(attempt)
+            logging.info(f"⏱️  Retrying {phase} (attempt {attempt + 1}/{policy.attempts}) in {delay:.1f}s")
+            run.incr(f"{phase}_retries")
+            time.sleep(delay)
+            if check:
+                try:
+                    result = check()
+                except Exception as e:
+                    logging.debug(f"Check for {phase} raised: {e}")
+                    result = None
+                if result:
+                    logging.info(f"✅ {phase} already holds, no need to redo it")
+                    checkpoint.mark(phase, result)
+                    return result
+
+        try:
+            result = action(attempt)
+        except Exception as e:
+            logging.warning(f"⚠️  {phase} failed on attempt {attempt + 1}/{policy.attempts}: {e}")
+            result = None
+        if result:
+            checkpoint.mark(phase, result)
+            return result
+
+    run.set("failed_phase", phase)
+    raise PhaseFailed(phase, f"gave up at the {phase} phase after {policy.attempts} attempt(s)")
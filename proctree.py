@@ -0,0 +1,149 @@
+"""
+Process tree helpers based on /proc.
+- Find every descendant of a process (chromedriver -> Chromium -> renderers).
+- Sum their resident memory.
+- Tell whether a recorded pid still belongs to the same process.
+- Read a process's CPU time and environment, and kill a set of processes.
+"""
+
+import os
+import signal
+import time
+
+PAGE_SIZE_KB = os.sysconf('SC_PAGE_SIZE') // 1024
+CLOCK_TICKS = os.sysconf('SC_CLK_TCK')
+
+
+def process_table():
+    """Map pid -> (ppid, rss_kb, cmdline) for every process we can read"""
+    table = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        pid = int(entry)
+        try:
+            with open(f'/proc/{pid}/stat', 'r') as f:
+                stat = f.read()
+            # comm may contain spaces; the fields after the closing paren are fixed
+            fields = stat[stat.rindex(')') + 2:].split()
+            ppid = int(fields[1])
+            rss_kb = int(fields[21]) * PAGE_SIZE_KB
+            with open(f'/proc/{pid}/cmdline', 'rb') as f:
+                cmdline = f.read().replace(b'\0', b' ').decode(errors='replace').strip()
+        except (OSError, ValueError, IndexError):
+            continue
+        table[pid] = (ppid, rss_kb, cmdline)
+    return table
+
+
+def descendants(root_pid, table=None):
+    """Return root_pid plus every process below it that is still alive"""
+    table = table if table is not None else process_table()
+    children = {}
+    for pid, (ppid, _, _) in table.items():
+        children.setdefault(ppid, []).append(pid)
+
+    found = []
+    stack = [root_pid]
+    while stack:
+        pid = stack.pop()
+        if pid not in table:
+            continue
+        found.append(pid)
+        stack.extend(children.get(pid, []))
+    return found
+
+
+def tree_rss_mb(root_pid):
+    """Resident memory of a whole process tree in MB"""
+    table = process_table()
+    return sum(table[pid][1] for pid in descendants(root_pid, table)) / 1024
+
+
+def _stat_fields(pid):
+    """The /proc/<pid>/stat fields after the command name (state first), or None"""
+    try:
+        with open(f'/proc/{pid}/stat', 'r') as f:
+            stat = f.read()
+        return stat[stat.rindex(')') + 2:].split()
+    except (OSError, ValueError):
+        return None
+
+
+def start_ticks(pid):
+    """When the process started (clock ticks since boot), or None if it is gone"""
+    fields = _stat_fields(pid)
+    try:
+        return int(fields[19]) if fields else None
+    except (ValueError, IndexError):
+        return None
+
+
+def cpu_seconds(pid):
+    """User plus system CPU time of a process, or None if it is gone"""
+    fields = _stat_fields(pid)
+    try:
+        return (int(fields[11]) + int(fields[12])) / CLOCK_TICKS if fields else None
+    except (ValueError, IndexError):
+        return None
+
+
+def is_zombie(pid):
+    """True if pid has exited but its parent has not collected it yet"""
+    fields = _stat_fields(pid)
+    return bool(fields) and fields[0] == 'Z'
+
+
+def read_environ(pid):
+    """A process's environment as a dict, or None if we may not read it"""
+    try:
+        with open(f'/proc/{pid}/environ', 'rb') as f:
+            data = f.read()
+    except OSError:
+        return None
+    environ = {}
+    for item in data.split(b'\0'):
+        key, sep, value = item.partition(b'=')
+        if sep:
+            environ[key.decode(errors='replace')] = value.decode(errors='replace')
+    return environ
+
+
+def process_alive(pid, ticks=None):
+    """True if pid is running and, when ticks is given, is not a reused pid"""
+    current = start_ticks(pid)
+    if current is None:
+        return False
+    return ticks is None or current == ticks
+
+
+def kill_processes(pids, grace=3.0):
+    """SIGTERM the processes, then SIGKILL whatever is still running after `grace` seconds.
+
+    Returns how many were signalled.
+    """
+    targets = {pid: start_ticks(pid) for pid in pids if pid != os.getpid()}
+    signalled = 0
+    for pid, ticks in targets.items():
+        if ticks is None:
+            continue
+        try:
+            os.kill(pid, signal.SIGTERM)
+            signalled += 1
+        except OSError:
+            pass
+
+    deadline = time.monotonic() + grace
+    while time.monotonic() < deadline:
+        if not any(process_alive(pid, ticks) and not is_zombie(pid) for pid, ticks in targets.items()):
+            return signalled
+        time.sleep(0.1)
+
+    for pid, ticks in targets.items():
+        # Re-check the start time so a pid reused in the meantime is left alone
+        if process_alive(pid, ticks) and not is_zombie(pid):
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except OSError:
+                pass
+    return signalled
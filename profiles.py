@@ -0,0 +1,267 @@
+"""
+Chromium profile manager.
+- Keeps one prepared template profile, taken from the first browser that
+  quits cleanly, and clones it for every new browser with reflinks where
+  the filesystem supports them and hardlinks only for versioned component
+  data that Chromium never rewrites.
+- Each profile records its owner's pid; profiles left by crashed or
+  OOM-killed runs (and old /tmp/chrome_temp_* dirs) are reaped on the next run.
+- Keeps the profile root under a size quota.
+- Records profile creation time and reclaimed bytes in the run metrics.
+"""
+
+import errno
+import fcntl
+import glob
+import logging
+import os
+import re
+import shutil
+import threading
+import time
+
+from metrics import current_run
+from proctree import start_ticks, process_alive
+
+PROFILE_ROOT = os.getenv('BROWSER_PROFILE_DIR', '/tmp/octopus-claimer-profiles')
+PROFILE_QUOTA_MB = int(os.getenv('BROWSER_PROFILE_QUOTA_MB', '256'))
+LEGACY_PATTERN = '/tmp/chrome_temp_*_*'
+OWNER_FILE = '.owner'
+FICLONE = 0x40049409  # ioctl: share the source file's blocks copy-on-write (Btrfs, XFS)
+
+# Per-run state the template should not carry over
+HARVEST_SKIP = {
+    'Crashpad', 'Crash Reports', 'BrowserMetrics', 'DeferredBrowserMetrics', 'ShaderCache',
+    'GrShaderCache', 'GraphiteDawnCache', 'cache', 'Default', OWNER_FILE,
+}
+# Of the Default profile only the preferences are worth keeping
+HARVEST_DEFAULT = ['Preferences', 'Secure Preferences']
+# Component updater data that is installed into <component>/<version>/ and never edited afterwards.
+# Only these may be hardlinked; everything else (Safe Browsing, shader caches, segmentation_platform,
+# ...) can be rewritten in place and is reflinked or copied.
+IMMUTABLE_COMPONENTS = {
+    'AutofillStates', 'CertificateRevocation', 'ClientSidePhishing', 'CookieReadinessList', 'Crowd Deny',
+    'FileTypePolicies', 'FirstPartySetsPreloaded', 'hyphen-data', 'MaskedDomainListPreloaded', 'MEIPreload',
+    'OnDeviceHeadSuggestModel', 'OpenCookieDatabase', 'OptimizationHints', 'OriginTrials', 'PKIMetadata',
+    'PrivacySandboxAttestationsPreloaded', 'Safety Tips', 'SSLErrorAssistant', 'TpcdMetadata',
+    'TrustTokenKeyCommitments', 'WasmTtsEngine', 'ZxcvbnData',
+}
+VERSION_DIR = re.compile(r'^\d+(?:\.\d+)+$')
+
+
+def _disk_usage(path, seen=None):
+    """Bytes used under path, counting hardlinked files once"""
+    seen = set() if seen is None else seen
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for name in filenames:
+            try:
+                st = os.lstat(os.path.join(dirpath, name))
+            except OSError:
+                continue
+            if (st.st_dev, st.st_ino) in seen:
+                continue
+            seen.add((st.st_dev, st.st_ino))
+            total += st.st_blocks * 512
+    return total
+
+
+def _private_bytes(path):
+    """Bytes that removing path would actually free (files not linked elsewhere)"""
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for name in filenames:
+            try:
+                st = os.lstat(os.path.join(dirpath, name))
+            except OSError:
+                continue
+            if st.st_nlink == 1:
+                total += st.st_blocks * 512
+    return total
+
+
+def _immutable(rel):
+    """Whether a template directory holds versioned component data Chromium never rewrites"""
+    parts = rel.split(os.sep)
+    return len(parts) > 1 and parts[0] in IMMUTABLE_COMPONENTS and bool(VERSION_DIR.match(parts[1]))
+
+
+class ProfileManager:
+    """Creates, clones, reaps and caps the browser profile directories"""
+
+    def __init__(self, root=PROFILE_ROOT, quota_mb=PROFILE_QUOTA_MB):
+        self.root = root
+        self.template = os.path.join(root, 'template')
+        self.quota_bytes = quota_mb * 1024 * 1024
+        self.active = set()
+        self._counter = 0
+        self._lock = threading.Lock()
+        self._reflink = True  # Until the filesystem says otherwise
+
+    # --- Cloning ---
+
+    def _clone_file(self, src, dst, linkable):
+        if self._reflink:
+            try:
+                with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+                    fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+                return 'reflink'
+            except OSError as e:
+                if e.errno not in (errno.EOPNOTSUPP, errno.ENOTTY, errno.EXDEV, errno.EINVAL, errno.ENOSYS):
+                    raise
+                self._reflink = False
+                os.unlink(dst)
+        # Hardlinked files are shared with the template, so only link what Chromium never rewrites in place
+        if linkable:
+            try:
+                os.link(src, dst)
+                return 'hardlink'
+            except OSError:
+                pass
+        shutil.copy2(src, dst)
+        return 'copy'
+
+    def _clone_template(self, dest):
+        counts = {}
+        for dirpath, dirnames, filenames in os.walk(self.template):
+            rel = os.path.relpath(dirpath, self.template)
+            target = dest if rel == '.' else os.path.join(dest, rel)
+            os.makedirs(target, exist_ok=True)
+            linkable = _immutable(rel)
+            for name in filenames:
+                src = os.path.join(dirpath, name)
+                if os.path.islink(src):
+                    continue
+                method = self._clone_file(src, os.path.join(target, name), linkable)
+                counts[method] = counts.get(method, 0) + 1
+        return counts
+
+    def _harvest(self, profile_dir):
+        """Turn a cleanly closed profile into the template (once)"""
+        staging = f"{self.template}.{os.getpid()}.tmp"
+        try:
+            shutil.rmtree(staging, ignore_errors=True)
+            os.makedirs(staging)
+            for entry in os.listdir(profile_dir):
+                src = os.path.join(profile_dir, entry)
+                if entry in HARVEST_SKIP or entry.startswith('Singleton') or os.path.islink(src):
+                    continue
+                if os.path.isdir(src):
+                    shutil.copytree(src, os.path.join(staging, entry), symlinks=True)
+                else:
+                    shutil.copy2(src, os.path.join(staging, entry))
+            for name in HARVEST_DEFAULT:
+                src = os.path.join(profile_dir, 'Default', name)
+                if os.path.exists(src):
+                    os.makedirs(os.path.join(staging, 'Default'), exist_ok=True)
+                    shutil.copy2(src, os.path.join(staging, 'Default', name))
+            os.rename(staging, self.template)
+            logging.info(f"📁 Saved browser profile template ({_disk_usage(self.template) / 1024 / 1024:.1f} MB)")
+        except OSError as e:
+            # Another process may have saved one first; either way we carry on without
+            logging.debug(f"Could not save profile template: {e}")
+            shutil.rmtree(staging, ignore_errors=True)
+
+    # --- Lifecycle ---
+
+    def create(self, use_template=True):
+        """Return a new profile directory for a browser started by this process"""
+        run = current_run()
+        self.reap_orphans()
+        self.enforce_quota()
+        with self._lock:
+            self._counter += 1
+            path = os.path.join(self.root, f"profile-{os.getpid()}-{self._counter}")
+            self.active.add(path)
+
+        start = time.monotonic()
+        with run.span("profile_create"):
+            shutil.rmtree(path, ignore_errors=True)
+            os.makedirs(path, exist_ok=True)
+            with open(os.path.join(path, OWNER_FILE), 'w') as f:
+                f.write(f"{os.getpid()} {start_ticks(os.getpid())}\n")
+            counts = {}
+            if use_template and os.path.isdir(self.template):
+                try:
+                    counts = self._clone_template(path)
+                except OSError as e:
+                    logging.warning(f"⚠️  Could not clone profile template, starting empty: {e}")
+        run.set("profile_clone", counts or {'empty': 1})
+        logging.info(f"📁 Browser profile ready in {time.monotonic() - start:.3f}s "
+                     f"({', '.join(f'{n} {m}' for m, n in counts.items()) or 'no template yet'})")
+        return path
+
+    def release(self, path, harvest=True):
+        """Remove a profile once its browser has quit, saving it as the template if there is none"""
+        if harvest and not os.path.isdir(self.template) and os.path.isdir(path):
+            self._harvest(path)
+        with self._lock:
+            self.active.discard(path)
+        shutil.rmtree(path, ignore_errors=True)
+
+    def release_all(self):
+        for path in list(self.active):
+            self.release(path)
+
+    # --- Housekeeping ---
+
+    def _owner(self, path):
+        """(pid, start ticks) of the process that created a profile"""
+        try:
+            with open(os.path.join(path, OWNER_FILE), 'r') as f:
+                pid, ticks = f.read().split()
+            return int(pid), int(ticks) if ticks != 'None' else None
+        except (OSError, ValueError):
+            match = re.search(r'(?:profile-|chrome_temp_)(\d+)[-_]', os.path.basename(path))
+            return (int(match.group(1)), None) if match else (None, None)
+
+    def _orphans(self):
+        candidates = glob.glob(os.path.join(self.root, 'profile-*')) + glob.glob(LEGACY_PATTERN)
+        orphans = []
+        for path in candidates:
+            pid, ticks = self._owner(path)
+            if pid is not None and not process_alive(pid, ticks):
+                orphans.append(path)
+        return orphans
+
+    def reap_orphans(self):
+        """Delete profiles whose owning process has died; returns bytes reclaimed"""
+        reclaimed = 0
+        orphans = self._orphans()
+        for path in orphans:
+            size = _private_bytes(path)
+            shutil.rmtree(path, ignore_errors=True)
+            if not os.path.exists(path):
+                reclaimed += size
+                logging.info(f"🧹 Reaped orphaned browser profile {path} ({size / 1024 / 1024:.1f} MB)")
+        if orphans:
+            run = current_run()
+            run.incr("profiles_reaped", len(orphans))
+            run.incr("profile_reclaimed_bytes", reclaimed)
+        return reclaimed
+
+    def enforce_quota(self):
+        """Keep the profile root under quota; the template is dropped first, live profiles never"""
+        if not os.path.isdir(self.root):
+            os.makedirs(self.root, exist_ok=True)
+            return
+        used = _disk_usage(self.root)
+        if used <= self.quota_bytes:
+            return
+        logging.warning(f"⚠️  Browser profiles use {used / 1024 / 1024:.0f} MB, "
+                        f"over the {self.quota_bytes / 1024 / 1024:.0f} MB quota")
+        if os.path.isdir(self.template):
+            size = _private_bytes(self.template)
+            shutil.rmtree(self.template, ignore_errors=True)
+            current_run().incr("profile_reclaimed_bytes", size)
+            logging.info(f"🧹 Dropped the profile template ({size / 1024 / 1024:.1f} MB); it is rebuilt on the next clean run")
+
+
+_default_manager = None
+
+
+def profile_manager():
+    global _default_manager
+    if _default_manager is None:
+        _default_manager = ProfileManager()
+    return _default_manager
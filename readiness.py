@@ -0,0 +1,87 @@
+"""
+Event-driven readiness waits.
+- Each wait polls a real signal (URL, document.readyState, network idle,
+  DOM content) and returns as soon as it holds.
+- Fixed sleeps are reduced to a small configurable floor.
+- Every wait logs how long it took against the old fixed sleep budget.
+"""
+
+import logging
+import os
+import time
+
+from cdp_events import event_log
+
+READINESS_FLOOR = float(os.getenv('READINESS_FLOOR', '0.25'))  # Minimum pause per step, seconds
+RETRY_DELAY = float(os.getenv('RETRY_DELAY', '2'))  # Base backoff between retries, seconds
+NETWORK_IDLE_SECONDS = 0.5
+POLL_INTERVAL = 0.1
+
+
+def wait_for(driver, condition, description, timeout=15, budget=None):
+    """Poll condition(driver) until it is truthy or the timeout passes; returns the last result"""
+    start = time.monotonic()
+    time.sleep(READINESS_FLOOR)
+
+    result = False
+    while True:
+        try:
+            result = condition(driver)
+        except Exception as e:
+            logging.debug(f"Readiness check '{description}' raised: {e}")
+            result = False
+        if result or time.monotonic() - start >= timeout:
+            break
+        time.sleep(POLL_INTERVAL)
+
+    waited = time.monotonic() - start
+    status = "ready" if result else "timed out"
+    budget_note = f" (fixed wait was up to {budget:.1f}s)" if budget else ""
+    logging.info(f"⏱️  {description}: {status} after {waited:.1f}s{budget_note}")
+    return result
+
+
+# --- Conditions ---
+
+def document_ready(driver):
+    return driver.execute_script("return document.readyState") == 'complete'
+
+
+def url_contains(fragment):
+    return lambda driver: fragment in driver.current_url
+
+
+def network_idle(idle_seconds=NETWORK_IDLE_SECONDS):
+    """True once no request has started or finished for idle_seconds.
+
+    Requests left open for a few seconds (long polls, event streams) are
+    ignored. Uses CDP network events when performance logging is on, otherwise falls
+    back to watching the resource timing buffer stop growing.
+    """
+    state = {'count': None, 'since': time.monotonic()}
+
+    def condition(driver):
+        log = event_log(driver)
+        if log.available:
+            idle = log.idle_seconds()
+            if log.available:
+                return idle >= idle_seconds
+
+        count = driver.execute_script("return performance.getEntriesByType('resource').length")
+        now = time.monotonic()
+        if count != state['count']:
+            state['count'] = count
+            state['since'] = now
+            return False
+        return now - state['since'] >= idle_seconds
+
+    return condition
+
+
+def all_of(*conditions):
+    return lambda driver: all(condition(driver) for condition in conditions)
+
+
+def wait_for_page_load(driver, description, timeout=15, budget=None):
+    """Wait for the document to finish loading and the network to go quiet"""
+    return wait_for(driver, all_of(document_ready, network_idle()), description, timeout, budget)
@@ -0,0 +1,154 @@
+"""
+Resource policy for the claimer's Chromium.
+- Blocks images, media, fonts and third-party trackers via CDP.
+- Keeps a persistent, size-capped HTTP cache for static assets between runs.
+- Reports bytes transferred, request count and renderer memory per run.
+"""
+
+import fcntl
+import logging
+import os
+import weakref
+
+from cdp_events import event_log
+from proctree import process_table, descendants
+
+RESOURCE_POLICY = os.getenv('RESOURCE_POLICY', 'lean').lower()  # lean or off
+CACHE_DIR = os.getenv('BROWSER_CACHE_DIR', os.path.expanduser('~/.cache/octopus-claimer/http-cache'))
+CACHE_SIZE_MB = int(os.getenv('BROWSER_CACHE_SIZE_MB', '50'))
+MAX_CACHE_SLOTS = 8
+
+# Extensions only; a pattern has to match the whole URL, so blocked_url_patterns() adds a
+# "*.png?*" variant of each for versioned asset URLs (logo.png?v=3)
+BLOCKED_TYPES = {
+    'images': ["*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.avif", "*.svg", "*.ico",
+               "*/_next/image?*"],  # Next.js image endpoint: no extension in the URL
+    'media': ["*.mp4", "*.webm", "*.mp3", "*.m4a", "*.ogg"],
+    'fonts': ["*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot"],
+}
+
+TRACKER_PATTERNS = [
+    "*google-analytics.com*",
+    "*googletagmanager.com*",
+    "*doubleclick.net*",
+    "*facebook.net*",
+    "*facebook.com/tr*",
+    "*hotjar.com*",
+    "*hotjar.io*",
+    "*clarity.ms*",
+    "*bat.bing.com*",
+    "*segment.io*",
+    "*segment.com*",
+    "*fullstory.com*",
+    "*intercom.io*",
+    "*intercomcdn.com*",
+    "*optimizely.com*",
+    "*tiktok.com*",
+    "*linkedin.com/px*",
+]
+
+
+def blocked_url_patterns():
+    patterns = [pattern for group in BLOCKED_TYPES.values() for pattern in group]
+    patterns += [f"{pattern}?*" for pattern in patterns if pattern.startswith('*.')]
+    patterns += TRACKER_PATTERNS
+    extra = os.getenv('BLOCK_URL_PATTERNS', '')
+    patterns += [pattern.strip() for pattern in extra.split(',') if pattern.strip()]
+    return patterns
+
+
+def add_lean_options(chrome_options):
+    """Chromium switches for a lean browser with a shared, capped disk cache"""
+    if RESOURCE_POLICY == 'off':
+        return None
+    # Images are also blocked at the network layer; this stops Blink decoding any that slip through
+    chrome_options.add_argument("--blink-settings=imagesEnabled=false")
+    chrome_options.add_argument(f"--disk-cache-size={CACHE_SIZE_MB * 1024 * 1024}")
+
+    slot_dir, lock_fd = _claim_cache_slot()
+    if slot_dir:
+        chrome_options.add_argument(f"--disk-cache-dir={slot_dir}")
+    return lock_fd
+
+
+def _claim_cache_slot():
+    """Lock a cache directory no other running browser is using.
+
+    Chromium's disk cache is not safe to share between live browsers, so each
+    concurrent browser (pool, daemon) gets its own slot; sequential runs keep
+    reusing slot 0.
+    """
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+    except OSError as e:
+        logging.warning(f"⚠️  Could not create browser cache dir: {e}")
+        return None, None
+
+    for slot in range(MAX_CACHE_SLOTS):
+        lock_path = os.path.join(CACHE_DIR, f"slot-{slot}.lock")
+        fd = os.open(lock_path, os.O_CREAT | os.O_RDWR, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            continue
+        return os.path.join(CACHE_DIR, f"slot-{slot}"), fd
+    return None, None
+
+
+def hold_cache_slot(driver, lock_fd):
+    """Keep the cache slot locked until the driver is closed (or garbage-collected)"""
+    if lock_fd is not None:
+        driver._cache_slot = weakref.finalize(driver, os.close, lock_fd)
+
+
+def release_cache_slot(driver):
+    """Unlock the driver's cache slot now rather than whenever the driver is collected"""
+    slot = getattr(driver, '_cache_slot', None)
+    if slot is not None:
+        slot()  # A finalizer runs at most once, so this never closes the fd twice
+
+
+def apply_resource_policy(driver):
+    """Block heavy and third-party requests for the current browser tab"""
+    if RESOURCE_POLICY == 'off' or not hasattr(driver, 'execute_cdp_cmd'):
+        return  # Firefox sets its equivalents as preferences at startup
+    try:
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': blocked_url_patterns()})
+        driver.execute_cdp_cmd('Performance.enable', {})
+    except Exception as e:
+        logging.warning(f"⚠️  Could not apply resource policy: {e}")
+
+
+def _renderer_rss_mb(driver):
+    try:
+        root_pid = driver.service.process.pid
+    except AttributeError:
+        return None
+    table = process_table()
+    rss_kb = sum(table[pid][1] for pid in descendants(root_pid, table) if '--type=renderer' in table[pid][2])
+    return round(rss_kb / 1024, 1)
+
+
+def resource_usage(driver, reset=True):
+    """Bytes, requests and renderer memory since the last call, for the run metrics"""
+    log = event_log(driver)
+    log.poll()
+    usage = dict(log.counters)
+    if reset:
+        log.reset_counters()
+
+    try:
+        metrics = driver.execute_cdp_cmd('Performance.getMetrics', {})['metrics']
+        values = {metric['name']: metric['value'] for metric in metrics}
+        usage['js_heap_mb'] = round(values.get('JSHeapUsedSize', 0) / 1024 / 1024, 1)
+        usage['dom_nodes'] = int(values.get('Nodes', 0))
+    except Exception as e:
+        logging.debug(f"Could not read renderer metrics: {e}")
+    usage['renderer_rss_mb'] = _renderer_rss_mb(driver)
+
+    logging.info(f"📦 Network: {usage['requests']} requests, {usage['bytes'] / 1024:.0f} KB transferred, "
+                 f"{usage['from_cache']} from cache, {usage['blocked']} blocked; "
+                 f"renderer RSS {usage['renderer_rss_mb']} MB")
+    return usage
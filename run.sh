@@ -5,7 +5,8 @@ DIR="$( cd "$( dirname "${BASH_SOURCE[0]}" )" &> /dev/null && pwd )"
 # Change to that directory
 cd "$DIR"
 
-# Source the environment file and run the Python script
+# Source the environment file (exporting every setting in it) and run the Python script
+set -a
 source .env
-export OCTOPUS_EMAIL OCTOPUS_PASSWORD OCTOPUS_ACCOUNT_ID
-/usr/bin/python3 "$DIR/claimer.py"
+set +a
+/usr/bin/python3 "$DIR/claimer.py" "$@"
@@ -0,0 +1,231 @@
+"""
+Process-tree watchdog for one claim run.
+- Tags chromedriver (and the Chromium it starts, which inherits the
+  environment) with the owning run's pid, so leftovers can be told apart
+  from anyone else's browsers.
+- At the start of a run, kills tagged processes whose owner has died.
+- While the run lasts, samples every child process. Over the wall-clock
+  limit the run is cancelled (worker threads see it via check_cancelled())
+  and its browsers are killed; a browser over the RSS or CPU limit is
+  killed on its own.
+- At the end, kills whatever the run left running and reports peak and
+  leaked process counts.
+"""
+
+import _thread
+import logging
+import os
+import re
+import threading
+import time
+
+from proctree import (process_table, descendants, start_ticks, process_alive, cpu_seconds,
+                      is_zombie, read_environ, kill_processes)
+
+RUN_TIMEOUT = float(os.getenv('RUN_TIMEOUT_SECONDS', '900'))
+RUN_MAX_RSS_MB = float(os.getenv('RUN_MAX_RSS_MB', '800'))
+RUN_MAX_CPU_SECONDS = float(os.getenv('RUN_MAX_CPU_SECONDS', '600'))
+WATCHDOG_INTERVAL = 2.0
+INTERRUPT_GRACE = 30  # Seconds the run gets to notice its browser is gone before it is interrupted
+
+OWNER_ENV = 'OCTOPUS_CLAIMER_OWNER'
+# Browsers started before tagging existed are recognised by their profile directory
+PROFILE_OWNER = re.compile(r'--user-data-dir=\S*(?:chrome_temp_|profile-)(\d+)[-_]')
+BROWSER_WORDS = ('chrom', 'headless_shell', 'firefox', 'geckodriver')  # chromedriver, chromium, chrome
+
+
+class RunBudgetExceeded(Exception):
+    """The watchdog stopped a run that went over its budget"""
+
+
+# Set when the run as a whole is out of time; worker threads check it between steps
+_cancelled = threading.Event()
+_cancel_reason = None
+
+
+def check_cancelled():
+    """Raise RunBudgetExceeded if the watchdog has cancelled the run"""
+    if _cancelled.is_set():
+        raise RunBudgetExceeded(_cancel_reason)
+
+
+def _cancel(reason):
+    global _cancel_reason
+    _cancel_reason = reason
+    _cancelled.set()
+
+
+def owner_tag():
+    """This process's pid and start time, as stored in OWNER_ENV"""
+    return f"{os.getpid()}:{start_ticks(os.getpid())}"
+
+
+def browser_env():
+    """The environment to start chromedriver with, tagged with this run as owner"""
+    return dict(os.environ, **{OWNER_ENV: owner_tag()})
+
+
+def _owner(pid, cmdline):
+    """(pid, start ticks) of the run that started a browser process, or None"""
+    environ = read_environ(pid) or {}
+    tag = environ.get(OWNER_ENV)
+    if tag:
+        owner, _, ticks = tag.partition(':')
+        try:
+            return int(owner), int(ticks) if ticks.isdigit() else None
+        except ValueError:
+            return None
+    match = PROFILE_OWNER.search(cmdline)
+    return (int(match.group(1)), None) if match else None
+
+
+def sweep_leftovers():
+    """Kill browser processes left running by runs that have since died; returns how many"""
+    table = process_table()
+    mine = set(descendants(os.getpid(), table))
+    leftovers = []
+    for pid, (_, _, cmdline) in table.items():
+        if pid in mine or not any(word in cmdline for word in BROWSER_WORDS):
+            continue
+        owner = _owner(pid, cmdline)
+        if owner and owner[0] != os.getpid() and not process_alive(*owner):
+            leftovers.append(pid)
+    if leftovers:
+        logging.warning(f"🧹 Killing {len(leftovers)} browser process(es) left behind by earlier runs")
+        kill_processes(leftovers)
+    return len(leftovers)
+
+
+class RunWatchdog:
+    """Watches this process's children for one run and kills them when they are over budget or done.
+
+    The wall-clock limit applies to the whole run; the RSS and CPU limits apply
+    to each browser separately (a chromedriver/geckodriver child of this
+    process and everything below it), so one heavy browser in a pool does not
+    take the others down with it.
+    """
+
+    def __init__(self, run, timeout=RUN_TIMEOUT, max_rss_mb=RUN_MAX_RSS_MB,
+                 max_cpu_seconds=RUN_MAX_CPU_SECONDS, interval=WATCHDOG_INTERVAL):
+        self.run = run
+        self.timeout = timeout
+        self.max_rss_mb = max_rss_mb
+        self.max_cpu_seconds = max_cpu_seconds
+        self.interval = interval
+        self.peak_processes = 0
+        self.peak_rss_mb = 0.0
+        # (pid, start ticks) -> (browser it belongs to, last CPU seconds seen), so exited children still count
+        self.cpu = {}
+        self.breach = None
+        self.browsers_killed = 0
+        self._stop = threading.Event()
+        self._thread = None
+        self._start = None
+        self._cancelled_at = None
+
+    def children(self, table=None):
+        table = table if table is not None else process_table()
+        return [pid for pid in descendants(os.getpid(), table) if pid != os.getpid() and not is_zombie(pid)]
+
+    def browser_cpu_seconds(self, browser):
+        return sum(seconds for owner, seconds in self.cpu.values() if owner == browser)
+
+    def sample(self):
+        """Update the peaks; returns [(reason, pids to kill, whole run)] for whatever is over budget"""
+        table = process_table()
+        pids = self.children(table)
+        alive = set(pids)
+        self.peak_processes = max(self.peak_processes, len(pids))
+        self.peak_rss_mb = max(self.peak_rss_mb, sum(table[pid][1] for pid in pids) / 1024)
+
+        breaches = []
+        elapsed = time.monotonic() - self._start
+        if elapsed > self.timeout:
+            breaches.append((f"ran for {elapsed:.0f}s (limit {self.timeout:.0f}s)", pids, True))
+
+        for root in (pid for pid in pids if table[pid][0] == os.getpid()):
+            browser = (root, start_ticks(root))
+            tree = [pid for pid in descendants(root, table) if pid in alive]
+            for pid in tree:
+                seconds = cpu_seconds(pid)
+                if seconds is not None:
+                    self.cpu[(pid, start_ticks(pid))] = (browser, seconds)
+            rss_mb = sum(table[pid][1] for pid in tree) / 1024
+            cpu = self.browser_cpu_seconds(browser)
+            if rss_mb > self.max_rss_mb:
+                breaches.append((f"browser {root} used {rss_mb:.0f} MB (limit {self.max_rss_mb:.0f} MB)", tree, False))
+            elif cpu > self.max_cpu_seconds:
+                breaches.append((f"browser {root} used {cpu:.0f}s of CPU (limit {self.max_cpu_seconds:.0f}s)",
+                                 tree, False))
+        return breaches
+
+    @property
+    def cpu_seconds(self):
+        return sum(seconds for _, seconds in self.cpu.values())
+
+    def _watch(self):
+        # Keeps watching after a breach: a pool may start a replacement browser that also needs policing
+        while not self._stop.wait(self.interval):
+            try:
+                breaches = self.sample()
+            except Exception as e:
+                logging.debug(f"Watchdog sample failed: {e}")
+                continue
+            for reason, pids, whole_run in breaches:
+                if whole_run and self._cancelled_at is not None:
+                    kill_processes(pids)  # Anything started since the run was cancelled
+                    continue
+                self.breach = self.breach or reason
+                if whole_run:
+                    logging.error(f"❌ Run over budget: {reason}; cancelling it and killing its browsers")
+                    _cancel(reason)
+                    self._cancelled_at = time.monotonic()
+                else:
+                    logging.error(f"❌ Browser over budget: {reason}; killing it")
+                    self.browsers_killed += 1
+                kill_processes(pids)
+            # A run blocked outside the browser (a sleep, a stuck socket) will not notice, so nudge it
+            if self._cancelled_at is not None and time.monotonic() - self._cancelled_at > INTERRUPT_GRACE:
+                logging.error("❌ Run did not stop after it was cancelled; interrupting it")
+                _thread.interrupt_main()
+                self._cancelled_at = float('inf')  # Once is enough
+
+    def __enter__(self):
+        _cancelled.clear()
+        swept = sweep_leftovers()
+        if swept:
+            self.run.incr("swept_processes", swept)
+        self._start = time.monotonic()
+        self._thread = threading.Thread(target=self._watch, name="run-watchdog", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stop.set()
+        self._thread.join()
+        try:
+            self.sample()
+        except Exception as e:
+            logging.debug(f"Watchdog sample failed: {e}")
+        leaked = self.children()
+        if leaked:
+            logging.warning(f"⚠️  Run left {len(leaked)} process(es) running; killing them")
+            kill_processes(leaked)
+        usage = {
+            'peak_processes': self.peak_processes,
+            'leaked_processes': len(leaked),
+            'peak_rss_mb': round(self.peak_rss_mb, 1),
+            'cpu_seconds': round(self.cpu_seconds, 1),
+        }
+        logging.info(f"🌳 Process tree: peak {usage['peak_processes']} process(es), {usage['peak_rss_mb']} MB, "
+                     f"{usage['cpu_seconds']}s CPU, {usage['leaked_processes']} leaked")
+        self.run.set("process_tree", usage)
+        if self.browsers_killed:
+            self.run.incr("browsers_killed", self.browsers_killed)
+        if self.breach:
+            self.run.set("budget_exceeded", self.breach)
+        cancelled = _cancelled.is_set()
+        _cancelled.clear()
+        if cancelled and exc_type is KeyboardInterrupt:
+            raise RunBudgetExceeded(self.breach) from exc
+        return False
@@ -0,0 +1,176 @@
+"""
+Session persistence for the Octopus Energy claimer.
+- Saves cookies and local storage after a successful login.
+- Restores them into a fresh driver so most runs can skip the login form.
+- Keeps simple counters of reused sessions vs. full logins.
+"""
+
+import json
+import logging
+import os
+import time
+import urllib.error
+import urllib.request
+
+SESSION_FILE = os.getenv(
+    'OCTOPUS_SESSION_FILE',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'session.json')
+)
+SESSION_TTL_HOURS = float(os.getenv('OCTOPUS_SESSION_TTL_HOURS', '72'))
+SESSION_CHECK_TIMEOUT = 10
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    """Stop urllib following redirects so a bounce to /login/ is visible"""
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+
+class SessionStore:
+    """Stores an authenticated browser session on disk with an expiry time"""
+
+    def __init__(self, path=SESSION_FILE, ttl_hours=SESSION_TTL_HOURS):
+        self.path = path
+        self.ttl_seconds = ttl_hours * 3600
+        self._checked = {}  # (dashboard url, saved_at) -> verdict, so each backend does not re-check
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f)
+        except (ValueError, OSError) as e:
+            logging.warning(f"⚠️  Could not read session file: {e}")
+            return {}
+
+    def _write(self, data):
+        # Write to a temp file first so a crash never leaves a half-written session
+        tmp_path = f"{self.path}.tmp"
+        try:
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'w') as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logging.error(f"❌ Failed to write session file: {e}")
+
+    def session(self):
+        """Return the saved session if it has not expired, else None"""
+        session = self._load().get('session')
+        if not session:
+            return None
+        if session.get('expires_at', 0) <= time.time():
+            logging.info("Saved session has expired")
+            return None
+        return session
+
+    def save(self, driver):
+        """Capture cookies and local storage from a logged-in driver"""
+        try:
+            cookies = driver.get_cookies()
+            local_storage = driver.execute_script(
+                "var items = {};"
+                "for (var i = 0; i < window.localStorage.length; i++) {"
+                "  var key = window.localStorage.key(i);"
+                "  items[key] = window.localStorage.getItem(key);"
+                "}"
+                "return items;"
+            ) or {}
+            user_agent = driver.execute_script("return navigator.userAgent")
+        except Exception as e:
+            logging.warning(f"⚠️  Could not capture session: {e}")
+            return
+
+        self.save_cookies(cookies, user_agent, local_storage)
+
+    def save_cookies(self, cookies, user_agent=None, local_storage=None):
+        """Store a session captured by any backend (browser or plain HTTP)"""
+        now = time.time()
+        data = self._load()
+        data['session'] = {
+            'cookies': cookies,
+            'local_storage': local_storage or {},
+            'user_agent': user_agent,
+            'saved_at': now,
+            'expires_at': now + self.ttl_seconds,
+        }
+        self._write(data)
+        logging.info(f"💾 Saved session ({len(cookies)} cookies) to {self.path}")
+
+    def is_valid(self, dashboard_url):
+        """Cheap check: request the dashboard with saved cookies and see if we stay there"""
+        session = self.session()
+        if not session:
+            return False
+        key = (dashboard_url, session.get('saved_at'))
+        if key in self._checked:
+            return self._checked[key]
+
+        cookie_header = "; ".join(f"{c['name']}={c['value']}" for c in session['cookies'])
+        request = urllib.request.Request(dashboard_url, headers={
+            'Cookie': cookie_header,
+            'User-Agent': session.get('user_agent') or 'Mozilla/5.0',
+            'Accept': 'text/html',
+        })
+        opener = urllib.request.build_opener(_NoRedirect)
+        try:
+            with opener.open(request, timeout=SESSION_CHECK_TIMEOUT) as response:
+                valid = response.status == 200 and 'login' not in response.geturl()
+        except urllib.error.HTTPError as e:
+            # Redirects surface here because _NoRedirect refuses to follow them
+            logging.info(f"Saved session rejected by dashboard (HTTP {e.code})")
+            valid = False
+        except (urllib.error.URLError, OSError) as e:
+            logging.warning(f"⚠️  Session check failed: {e}")
+            valid = False
+
+        self._checked[key] = valid
+        return valid
+
+    def restore(self, driver, origin_url):
+        """Load saved cookies and local storage into the driver"""
+        session = self.session()
+        if not session:
+            return False
+
+        # Cookies and local storage can only be set for the page's own origin;
+        # robots.txt is the lightest page on it
+        driver.get(f"{origin_url.rstrip('/')}/robots.txt")
+        for cookie in session['cookies']:
+            try:
+                driver.add_cookie(cookie)
+            except Exception as e:
+                logging.debug(f"Skipped cookie {cookie.get('name')}: {e}")
+
+        if session.get('local_storage'):
+            driver.execute_script(
+                "var items = arguments[0];"
+                "for (var key in items) { window.localStorage.setItem(key, items[key]); }",
+                session['local_storage']
+            )
+        return True
+
+    def clear(self):
+        """Forget the saved session but keep the stats"""
+        data = self._load()
+        if data.pop('session', None) is not None:
+            self._write(data)
+
+    def _bump(self, counter):
+        data = self._load()
+        stats = data.setdefault('stats', {'reused': 0, 'logins': 0})
+        stats[counter] = stats.get(counter, 0) + 1
+        self._write(data)
+
+    def record_reuse(self):
+        self._bump('reused')
+
+    def record_login(self):
+        self._bump('logins')
+
+    def stats(self):
+        """Return how many runs reused a session and how many had to log in"""
+        stats = self._load().get('stats', {})
+        return {'reused': stats.get('reused', 0), 'logins': stats.get('logins', 0)}
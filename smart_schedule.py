@@ -0,0 +1,146 @@
+"""
+Smart claim scheduling.
+- Learns the daily code-release window from past attempts.
+- Plans attempts close to that window, more often near the expected
+  release time and not at all outside the window; widens the window when
+  the codes stop appearing inside it.
+- Sleeps until next week once this week's claim is done.
+"""
+
+import logging
+import os
+import statistics
+import time
+from datetime import datetime, timedelta
+
+DEFAULT_WINDOW = os.getenv('SCHEDULE_DEFAULT_WINDOW', '06:00-12:00')  # Used until there is history
+LEARNING_DAYS = int(os.getenv('SCHEDULE_LEARNING_DAYS', '28'))
+WINDOW_MARGIN = timedelta(minutes=15)
+WINDOW_WIDEN = timedelta(minutes=60)  # Added to the window's end for each day the codes never came
+MIN_INTERVAL = timedelta(minutes=int(os.getenv('SCHEDULE_MIN_INTERVAL_MINUTES', '5')))
+MAX_INTERVAL = timedelta(minutes=int(os.getenv('SCHEDULE_MAX_INTERVAL_MINUTES', '60')))
+MAX_SLEEP_SECONDS = 3600  # Re-plan at least hourly so clock changes are picked up
+
+
+def _minutes(moment):
+    return moment.hour * 60 + moment.minute + moment.second / 60
+
+
+def _parse_window(window):
+    start, end = window.split('-')
+    to_minutes = lambda hhmm: int(hhmm.split(':')[0]) * 60 + int(hhmm.split(':')[1])
+    return to_minutes(start), to_minutes(end)
+
+
+def learn_release_window(attempts, now=None):
+    """Return (start, expected, end) minutes after midnight for code releases.
+
+    For every day with a successful claim, the release happened after the
+    last "unavailable" attempt that day and before the first success. A later
+    day that was still "unavailable" past the latest release seen means the
+    release has moved later: the window is widened (to at least the default
+    window's end, plus WINDOW_WIDEN per such day) so the next attempts can
+    find the new time.
+    """
+    now = now or datetime.now()
+    since = now - timedelta(days=LEARNING_DAYS)
+    days = {}
+    for when, outcome in attempts:
+        if when >= since:
+            days.setdefault(when.date(), []).append((when, outcome))
+
+    lower_bounds = []
+    upper_bounds = []
+    for day_attempts in days.values():
+        successes = [when for when, outcome in day_attempts if outcome == 'claimed']
+        if not successes:
+            continue
+        first_success = min(successes)
+        misses = [when for when, outcome in day_attempts
+                  if outcome == 'unavailable' and when < first_success]
+        upper_bounds.append(_minutes(first_success))
+        lower_bounds.append(_minutes(max(misses)) if misses else _minutes(first_success) - 60)
+
+    if not upper_bounds:
+        start, end = _parse_window(DEFAULT_WINDOW)
+        return start, start, end
+
+    margin = WINDOW_MARGIN.total_seconds() / 60
+    start = max(0, min(lower_bounds) - margin)
+    end = max(upper_bounds) + margin
+    expected = statistics.median(upper_bounds)
+
+    last_claim_day = max(day for day, day_attempts in days.items()
+                         if any(outcome == 'claimed' for _, outcome in day_attempts))
+    missed_days = sum(
+        1 for day, day_attempts in days.items()
+        if day > last_claim_day and any(outcome == 'unavailable' and _minutes(when) >= max(upper_bounds)
+                                        for when, outcome in day_attempts)
+    )
+    if missed_days:
+        end = max(end, _parse_window(DEFAULT_WINDOW)[1]) + missed_days * WINDOW_WIDEN.total_seconds() / 60
+    return start, expected, min(24 * 60 - 1, end)
+
+
+def plan_next_attempt(attempts, now, claimed_this_week):
+    """Return the datetime of the next claim attempt"""
+    start, expected, end = learn_release_window(attempts, now)
+    midnight = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    at = lambda day, minutes: day + timedelta(minutes=minutes)
+
+    if claimed_this_week:
+        next_monday = midnight + timedelta(days=7 - now.weekday())
+        return at(next_monday, start)
+
+    window_start, window_end = at(midnight, start), at(midnight, end)
+    if now < window_start:
+        return window_start
+    if now > window_end:
+        return at(midnight + timedelta(days=1), start)
+
+    # Inside the window: poll often close to the expected release, less so further away
+    distance = abs(now - at(midnight, expected))
+    interval = min(MAX_INTERVAL, max(MIN_INTERVAL, distance / 2))
+    today_attempts = [when for when, _ in attempts if when.date() == now.date()]
+    last_attempt = max(today_attempts) if today_attempts else None
+    if last_attempt is None or now - last_attempt >= interval:
+        return now
+
+    next_at = last_attempt + interval
+    if next_at > window_end:
+        return at(midnight + timedelta(days=1), start)
+    return next_at
+
+
+def sessions_per_claim(attempts):
+    """Browser sessions spent per successful claim (lower is better)"""
+    claims = sum(1 for _, outcome in attempts if outcome == 'claimed')
+    sessions = sum(1 for _, outcome in attempts if outcome not in ('already_claimed', 'started'))
+    return sessions / claims if claims else None
+
+
+def run_scheduler(claim_once, claimed_this_week, load_history, sleep=time.sleep):
+    """Loop forever: plan the next attempt, sleep until then, claim"""
+    logging.info("🗓️  Smart scheduler started")
+    started = []  # Our own attempt times, in case a run dies before it is recorded
+    while True:
+        now = datetime.now()
+        attempts = load_history() + [(when, 'started') for when in started if when.date() == now.date()]
+        next_at = plan_next_attempt(attempts, now, claimed_this_week())
+        wait = (next_at - now).total_seconds()
+
+        if wait > 0:
+            start, expected, end = learn_release_window(attempts, now)
+            fmt = lambda minutes: f"{int(minutes) // 60:02d}:{int(minutes) % 60:02d}"
+            ratio = sessions_per_claim(attempts)
+            ratio_note = f", {ratio:.1f} sessions per claim so far" if ratio else ""
+            logging.info(f"⏰ Next attempt {next_at:%a %d %b %H:%M} (release window {fmt(start)}-{fmt(end)}, "
+                         f"expected ~{fmt(expected)}{ratio_note})")
+            sleep(min(wait, MAX_SLEEP_SECONDS))
+            continue
+
+        started.append(now)
+        try:
+            claim_once()
+        except Exception as e:
+            logging.error(f"❌ Scheduled claim failed: {e}")